@@ -11,11 +11,20 @@ from flask_cors import CORS
 
 from config import Config
 from services.yuri_manager import YuriManager
-from services.config_generator import ConfigGenerator
+from services.config_generator import ConfigGenerator, PREVIEW_DIR
 from services.ndi_discovery import NDIDiscoveryService
-from services.ptz_controller import PTZController
+from services.ptz_registry import PTZRegistry
+from services.ptz_presets import PTZPresetStore
 from services.auth_service import AuthService
-from routes import sources, viewer, ptz, output, preview, auth
+from services.event_bus import EventBus
+from services.preview_hub import PreviewHub
+from services.preview_monitor import NDIPreviewMonitor, VIEWER_PREVIEW_NAME, OUTPUT_PREVIEW_NAME
+from services.viewer_switcher import ViewerSwitcher
+from services.pipeline_manager import PipelineManager
+from services.process_metrics import ProcessSampler
+from services.process_scheduling import (SchedulingPolicy, available_cpus, confine_current_process,
+                                         parse_cpu_list)
+from routes import sources, viewer, ptz, output, preview, auth, events, processes, pipelines
 
 # Configure logging
 logging.basicConfig(
@@ -36,29 +45,119 @@ def create_app(config_class=Config):
     # Ensure directories exist
     os.makedirs(config_class.CONFIG_DIR, exist_ok=True)
 
+    # Keep the web backend on its housekeeping cores and give yuri the others unless told otherwise
+    backend_cpus = parse_cpu_list(config_class.BACKEND_CPU_AFFINITY)
+    if backend_cpus:
+        confine_current_process(backend_cpus)
+    yuri_scheduling = SchedulingPolicy.from_dict({
+        'cpus': config_class.YURI_CPU_AFFINITY or None,
+        'nice': config_class.YURI_NICE,
+        'realtime_priority': config_class.YURI_REALTIME_PRIORITY,
+        'cpu_max': config_class.YURI_CPU_MAX or None,
+        'memory_max': config_class.YURI_MEMORY_MAX or None
+    })
+    if yuri_scheduling.cpus is None and backend_cpus and available_cpus() - backend_cpus:
+        yuri_scheduling.cpus = available_cpus() - backend_cpus
+
     # Initialize services
+    app.config['event_bus'] = EventBus()
+    app.config['preview_hub'] = PreviewHub(preview_root=PREVIEW_DIR)
+
     app.config['yuri_manager'] = YuriManager(
         yuri_bin=config_class.YURI_BIN,
         config_dir=config_class.CONFIG_DIR,
         extra_ips_file=config_class.NDI_EXTRA_IPS_FILE,
         lib_path=config_class.YURI_LIB_PATH,
-        ndi_lib_path=config_class.NDI_LIB_PATH
+        ndi_lib_path=config_class.NDI_LIB_PATH,
+        event_bus=app.config['event_bus'],
+        preview_hub=app.config['preview_hub'],
+        ready_timeout=config_class.YURI_READY_TIMEOUT,
+        log_lines=config_class.YURI_LOG_LINES,
+        log_dir=config_class.YURI_LOG_DIR,
+        log_max_bytes=config_class.YURI_LOG_MAX_BYTES,
+        log_backups=config_class.YURI_LOG_BACKUPS,
+        restart_policy=config_class.YURI_RESTART_POLICY,
+        restart_backoff=config_class.YURI_RESTART_BACKOFF,
+        restart_backoff_max=config_class.YURI_RESTART_BACKOFF_MAX,
+        crash_loop_window=config_class.YURI_CRASH_LOOP_WINDOW,
+        crash_loop_restarts=config_class.YURI_CRASH_LOOP_RESTARTS,
+        scheduling=yuri_scheduling,
+        cgroup_root=config_class.YURI_CGROUP_ROOT
     )
 
     app.config['config_generator'] = ConfigGenerator(
         template_dir=config_class.TEMPLATE_DIR,
-        output_dir=config_class.CONFIG_DIR
+        output_dir=config_class.CONFIG_DIR,
+        preview_root=PREVIEW_DIR
+    )
+
+    app.config['preview_monitor'] = NDIPreviewMonitor(
+        yuri_manager=app.config['yuri_manager'],
+        config_generator=app.config['config_generator'],
+        preview_hub=app.config['preview_hub'],
+        renditions=config_class.PREVIEW_RENDITIONS,
+        name=VIEWER_PREVIEW_NAME,
+        linger=config_class.VIEWER_PREVIEW_LINGER,
+        event_bus=app.config['event_bus']
+    )
+
+    app.config['output_preview_monitor'] = NDIPreviewMonitor(
+        yuri_manager=app.config['yuri_manager'],
+        config_generator=app.config['config_generator'],
+        preview_hub=app.config['preview_hub'],
+        renditions=config_class.PREVIEW_RENDITIONS,
+        name=OUTPUT_PREVIEW_NAME,
+        linger=config_class.VIEWER_PREVIEW_LINGER,
+        event_bus=app.config['event_bus'],
+        # Our output is set by stream name; its full NDI name is whatever discovery sees
+        resolve_source=lambda stream: app.config['discovery_service'].find_stream(stream)
     )
 
     app.config['discovery_service'] = NDIDiscoveryService(
         yuri_bin=config_class.YURI_BIN,
         extra_ips_file=config_class.NDI_EXTRA_IPS_FILE,
         lib_path=config_class.YURI_LIB_PATH,
-        ndi_lib_path=config_class.NDI_LIB_PATH
+        ndi_lib_path=config_class.NDI_LIB_PATH,
+        ndi_discover_bin=config_class.NDI_DISCOVER_BIN,
+        timeout=config_class.DISCOVERY_TIMEOUT,
+        interval=config_class.DISCOVERY_INTERVAL,
+        stale_after=config_class.DISCOVERY_STALE_AFTER,
+        event_bus=app.config['event_bus']
+    )
+    app.config['discovery_service'].start()
+
+    app.config['process_sampler'] = ProcessSampler(
+        yuri_manager=app.config['yuri_manager'],
+        interval=config_class.METRICS_INTERVAL,
+        history=config_class.METRICS_HISTORY,
+        vcgencmd_bin=config_class.VCGENCMD_BIN
+    )
+    app.config['process_sampler'].start()
+
+    app.config['ptz_registry'] = PTZRegistry(
+        targets_file=config_class.PTZ_TARGETS_FILE,
+        default_url=f'http://localhost:{config_class.YURI_WEBSERVER_PORT}/control'
+    )
+
+    app.config['viewer_switcher'] = ViewerSwitcher(
+        yuri_manager=app.config['yuri_manager'],
+        process_name=viewer.VIEWER_PROCESS_NAME
+    )
+
+    app.config['pipeline_manager'] = PipelineManager(
+        yuri_manager=app.config['yuri_manager'],
+        config_generator=app.config['config_generator'],
+        reserved_names=[viewer.VIEWER_PROCESS_NAME, output.OUTPUT_PROCESS_NAME,
+                        VIEWER_PREVIEW_NAME, OUTPUT_PREVIEW_NAME],
+        cpu_budget=config_class.PIPELINE_CPU_BUDGET,
+        reserved_cores=config_class.PIPELINE_CPU_RESERVED,
+        # Admit against the cores yuri may use
+        cpu_count=len(yuri_scheduling.cpus) if yuri_scheduling.cpus else None,
+        process_sampler=app.config['process_sampler']
     )
 
-    app.config['ptz_controller'] = PTZController(
-        control_url=f'http://localhost:{config_class.YURI_WEBSERVER_PORT}/control'
+    app.config['ptz_presets'] = PTZPresetStore(
+        presets_file=config_class.PTZ_PRESETS_FILE
     )
 
     app.config['auth_service'] = AuthService(
@@ -75,6 +174,9 @@ def create_app(config_class=Config):
     app.register_blueprint(ptz.bp, url_prefix='/api/ptz')
     app.register_blueprint(output.bp, url_prefix='/api/output')
     app.register_blueprint(preview.bp, url_prefix='/api/preview')
+    app.register_blueprint(events.bp, url_prefix='/api/events')
+    app.register_blueprint(processes.bp, url_prefix='/api/processes')
+    app.register_blueprint(pipelines.bp, url_prefix='/api/pipelines')
 
     # Health check endpoint
     @app.route('/api/health')
@@ -98,6 +200,8 @@ def create_app(config_class=Config):
                     'viewer': '/api/viewer/',
                     'ptz': '/api/ptz/',
                     'output': '/api/output/',
+                    'pipelines': '/api/pipelines',
+                    'events': '/api/events',
                     'health': '/api/health'
                 }
             })
@@ -109,7 +213,11 @@ def create_app(config_class=Config):
     # Cleanup on shutdown
     def cleanup():
         logger.info("Shutting down, stopping all yuri processes...")
+        app.config['discovery_service'].stop()
+        app.config['process_sampler'].stop()
+        app.config['pipeline_manager'].destroy_all()
         app.config['yuri_manager'].stop_all()
+        app.config['ptz_registry'].close()
 
     atexit.register(cleanup)
 
@@ -7,6 +7,32 @@ class Config:
     # Yuri paths
     YURI_BIN = os.environ.get('YURI_BIN', '/usr/local/bin/yuri2')
     YURI_LIB_PATH = os.environ.get('YURI_LIB_PATH', '/usr/local/lib')
+    # Seconds to wait for a started yuri process to confirm it is up
+    YURI_READY_TIMEOUT = float(os.environ.get('YURI_READY_TIMEOUT', 5.0))
+    # yuri stdout/stderr: lines kept in memory per process, optional rotated files in YURI_LOG_DIR
+    YURI_LOG_LINES = int(os.environ.get('YURI_LOG_LINES', 2000))
+    YURI_LOG_DIR = os.environ.get('YURI_LOG_DIR', '')
+    YURI_LOG_MAX_BYTES = int(os.environ.get('YURI_LOG_MAX_BYTES', 1024 * 1024))
+    YURI_LOG_BACKUPS = int(os.environ.get('YURI_LOG_BACKUPS', 3))
+    # Restart of yuri processes that exit on their own: 'never', 'on-failure' (non-zero exit) or 'always'
+    YURI_RESTART_POLICY = os.environ.get('YURI_RESTART_POLICY', 'on-failure')
+    YURI_RESTART_BACKOFF = float(os.environ.get('YURI_RESTART_BACKOFF', 1.0))
+    YURI_RESTART_BACKOFF_MAX = float(os.environ.get('YURI_RESTART_BACKOFF_MAX', 60.0))
+    # Give up after more than YURI_CRASH_LOOP_RESTARTS exits within YURI_CRASH_LOOP_WINDOW seconds
+    YURI_CRASH_LOOP_WINDOW = float(os.environ.get('YURI_CRASH_LOOP_WINDOW', 60.0))
+    YURI_CRASH_LOOP_RESTARTS = int(os.environ.get('YURI_CRASH_LOOP_RESTARTS', 5))
+    # Default scheduling of yuri processes (start APIs can override it per process): CPU list like
+    # '1-3' (empty: all cores not given to the backend), nice level, SCHED_FIFO priority (0: off)
+    YURI_CPU_AFFINITY = os.environ.get('YURI_CPU_AFFINITY', '')
+    YURI_NICE = int(os.environ.get('YURI_NICE', 0))
+    YURI_REALTIME_PRIORITY = int(os.environ.get('YURI_REALTIME_PRIORITY', 0))
+    # Optional cgroup v2 limits per yuri process: cores (e.g. 1.5) and memory (e.g. 512M); they need a
+    # delegated cgroup, the service's own (Delegate=yes) unless YURI_CGROUP_ROOT names another
+    YURI_CPU_MAX = os.environ.get('YURI_CPU_MAX', '')
+    YURI_MEMORY_MAX = os.environ.get('YURI_MEMORY_MAX', '')
+    YURI_CGROUP_ROOT = os.environ.get('YURI_CGROUP_ROOT', '')
+    # Housekeeping cores the web backend is confined to (e.g. '0'; empty: not confined)
+    BACKEND_CPU_AFFINITY = os.environ.get('BACKEND_CPU_AFFINITY', '')
     NDI_LIB_PATH = os.environ.get('NDI_LIB_PATH', '/usr/local/lib/libndi.so.6')
 
     # Directories
@@ -17,6 +43,10 @@ class Config:
 
     # NDI settings
     NDI_EXTRA_IPS_FILE = os.environ.get('NDI_EXTRA_IPS_FILE', os.path.join(BASE_DIR, 'configs', 'extra_ips.txt'))
+    NDI_DISCOVER_BIN = os.environ.get('NDI_DISCOVER_BIN', '/usr/local/bin/ndi_discover')
+    DISCOVERY_TIMEOUT = int(os.environ.get('DISCOVERY_TIMEOUT', 8))
+    DISCOVERY_INTERVAL = float(os.environ.get('DISCOVERY_INTERVAL', 2.0))
+    DISCOVERY_STALE_AFTER = float(os.environ.get('DISCOVERY_STALE_AFTER', 30.0))
 
     # Authentication
     CREDENTIALS_FILE = os.environ.get('CREDENTIALS_FILE', os.path.join(BASE_DIR, 'configs', 'credentials.json'))
@@ -26,9 +56,40 @@ class Config:
     FLASK_HOST = os.environ.get('FLASK_HOST', '0.0.0.0')
     FLASK_PORT = int(os.environ.get('FLASK_PORT', 5000))
     YURI_WEBSERVER_PORT = int(os.environ.get('YURI_WEBSERVER_PORT', 8080))
+    # Additional PTZ cameras: {"<target>": "<control url>"}
+    PTZ_TARGETS_FILE = os.environ.get('PTZ_TARGETS_FILE', os.path.join(BASE_DIR, 'configs', 'ptz_targets.json'))
+    # Server-side PTZ presets; recall mode 'native' (camera command) or 'interpolated' (server-driven move)
+    PTZ_PRESETS_FILE = os.environ.get('PTZ_PRESETS_FILE', os.path.join(BASE_DIR, 'configs', 'ptz_presets.json'))
+    PTZ_PRESET_RECALL_MODE = os.environ.get('PTZ_PRESET_RECALL_MODE', 'native')
+    PTZ_PRESET_DURATION = float(os.environ.get('PTZ_PRESET_DURATION', 1.5))
+    PTZ_PRESET_TICK_HZ = float(os.environ.get('PTZ_PRESET_TICK_HZ', 20))
+    # Send /api/ptz/batch commands to yuri as one query string instead of one request each
+    PTZ_BATCH_SINGLE_REQUEST = os.environ.get('PTZ_BATCH_SINGLE_REQUEST', 'false').lower() in ('1', 'true', 'yes')
 
     # Default NDI output settings
     DEFAULT_NDI_OUTPUT_NAME = os.environ.get('DEFAULT_NDI_OUTPUT_NAME', 'RaspberryPi-NDI')
     DEFAULT_VIDEO_DEVICE = os.environ.get('DEFAULT_VIDEO_DEVICE', '/dev/video0')
     DEFAULT_RESOLUTION = os.environ.get('DEFAULT_RESOLUTION', '1280x720')
     DEFAULT_FPS = int(os.environ.get('DEFAULT_FPS', 30))
+
+    # Preview renditions produced by output pipelines (comma-separated: thumb, sd, hd)
+    PREVIEW_RENDITIONS = [r.strip() for r in os.environ.get('PREVIEW_RENDITIONS', 'sd').split(',') if r.strip()]
+    # Output preview: 'on_demand' runs a separate receiver of our own NDI stream only while
+    # someone watches; 'inline' encodes preview branches inside the output graph all the time.
+    # on_demand saves the branch cost while nobody watches, but while someone does it adds a
+    # second NDI receive + decode of the stream and costs more than inline
+    OUTPUT_PREVIEW_MODE = os.environ.get('OUTPUT_PREVIEW_MODE', 'inline')
+
+    # Seconds an on-demand preview keeps running after its last client disconnects
+    VIEWER_PREVIEW_LINGER = float(os.environ.get('VIEWER_PREVIEW_LINGER', 10.0))
+
+    # Resource sampling of yuri processes (/api/processes/<name>/metrics): seconds between
+    # samples, samples kept per process, and the Pi firmware tool for throttling flags
+    METRICS_INTERVAL = float(os.environ.get('METRICS_INTERVAL', 2.0))
+    METRICS_HISTORY = int(os.environ.get('METRICS_HISTORY', 300))
+    VCGENCMD_BIN = os.environ.get('VCGENCMD_BIN', 'vcgencmd')
+
+    # Admission control for /api/pipelines: share of all cores yuri may use, and cores kept free
+    # for the web backend and the system
+    PIPELINE_CPU_BUDGET = float(os.environ.get('PIPELINE_CPU_BUDGET', 0.85))
+    PIPELINE_CPU_RESERVED = float(os.environ.get('PIPELINE_CPU_RESERVED', 0.5))
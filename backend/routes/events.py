@@ -0,0 +1,61 @@
+"""
+Event Stream API - Server-Sent Events for sources, process status and preview
+"""
+import queue
+from flask import Blueprint, Response, current_app
+
+from services.event_bus import format_sse
+
+bp = Blueprint('events', __name__)
+
+KEEPALIVE_INTERVAL = 15  # Seconds between keep-alive comments
+
+
+def get_event_bus():
+    return current_app.config['event_bus']
+
+
+def get_snapshot():
+    """Current state sent to each client when it connects"""
+    yuri_manager = current_app.config['yuri_manager']
+    return {
+        'sources': current_app.config['discovery_service'].list_sources(),
+        'processes': yuri_manager.get_all_status(),
+        'previews': yuri_manager.get_previews(),
+        'preview_monitors': {
+            monitor.name: monitor.get_state()
+            for monitor in (current_app.config['preview_monitor'], current_app.config['output_preview_monitor'])
+        }
+    }
+
+
+def generate_events(bus, snapshot):
+    """Generator that yields the initial snapshot and then every published event"""
+    q = bus.subscribe()
+    try:
+        yield format_sse('snapshot', snapshot)
+        while True:
+            try:
+                event, data = q.get(timeout=KEEPALIVE_INTERVAL)
+            except queue.Empty:
+                # Comment line keeps proxies and the browser from timing out
+                yield ': keepalive\n\n'
+                continue
+            yield format_sse(event, data)
+    except GeneratorExit:
+        # Client disconnected
+        pass
+    finally:
+        bus.unsubscribe(q)
+
+
+@bp.route('', methods=['GET'])
+def events():
+    """Server-Sent Events stream"""
+    response = Response(
+        generate_events(get_event_bus(), get_snapshot()),
+        mimetype='text/event-stream'
+    )
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
@@ -5,6 +5,8 @@ from flask import Blueprint, jsonify, request, current_app
 import subprocess
 import re
 
+from services.config_generator import PREVIEW_RENDITIONS
+
 bp = Blueprint('output', __name__)
 
 OUTPUT_PROCESS_NAME = 'output'
@@ -22,6 +24,10 @@ def get_config():
     return current_app.config['app_config']
 
 
+def get_output_preview_monitor():
+    return current_app.config['output_preview_monitor']
+
+
 @bp.route('/start', methods=['POST'])
 def start_output():
     """Start NDI output from camera"""
@@ -43,6 +49,18 @@ def start_output():
 
     fps = int(data.get('fps', get_config().DEFAULT_FPS))
     ptz_enabled = data.get('ptz', False)
+    preview_renditions = data.get('preview_renditions', get_config().PREVIEW_RENDITIONS)
+    if not isinstance(preview_renditions, list) or any(r not in PREVIEW_RENDITIONS for r in preview_renditions):
+        return jsonify({'error': f"preview_renditions must be a list of: {', '.join(PREVIEW_RENDITIONS)}"}), 400
+    # On demand, the output graph carries no preview branches; a separate receiver encodes them while watched
+    on_demand = get_config().OUTPUT_PREVIEW_MODE == 'on_demand'
+    inline_renditions = [] if on_demand else preview_renditions
+    wait = bool(data.get('wait', True))
+    try:
+        # CPU affinity, nice/realtime priority and cgroup limits for this process
+        scheduling = get_yuri_manager().scheduling_for(data.get('scheduling'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
     try:
         config_gen = get_config_generator()
@@ -52,7 +70,8 @@ def start_output():
                 output_name=output_name,
                 resolution=resolution,
                 fps=fps,
-                ptz_enabled=ptz_enabled
+                ptz_enabled=ptz_enabled,
+                preview_renditions=inline_renditions
             )
         else:
             config_path = config_gen.generate_v4l2_output_config(
@@ -60,13 +79,22 @@ def start_output():
                 output_name=output_name,
                 resolution=resolution,
                 fps=fps,
-                ptz_enabled=ptz_enabled
+                ptz_enabled=ptz_enabled,
+                preview_renditions=inline_renditions
             )
 
-        result = get_yuri_manager().start_process(OUTPUT_PROCESS_NAME, config_path)
+        result = get_yuri_manager().start_process(
+            OUTPUT_PROCESS_NAME, config_path, preview_renditions=inline_renditions, wait=wait,
+            scheduling=scheduling
+        )
+        if on_demand and preview_renditions:
+            get_output_preview_monitor().set_source(output_name, preview_renditions)
+        else:
+            get_output_preview_monitor().set_source(None)
         result['output_name'] = output_name
         result['source_type'] = source_type
-        return jsonify(result)
+        result['preview_mode'] = get_config().OUTPUT_PREVIEW_MODE
+        return jsonify(result), 200 if wait else 202
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -76,6 +104,7 @@ def stop_output():
     """Stop NDI output"""
     try:
         result = get_yuri_manager().stop_process(OUTPUT_PROCESS_NAME)
+        get_output_preview_monitor().set_source(None)
         return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
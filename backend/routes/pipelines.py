@@ -0,0 +1,82 @@
+"""
+Pipeline API Routes - Named capture-to-NDI pipelines beyond the single output
+"""
+from flask import Blueprint, jsonify, request, current_app
+
+from services.pipeline_manager import InsufficientCPU
+
+bp = Blueprint('pipelines', __name__)
+
+
+def get_pipeline_manager():
+    return current_app.config['pipeline_manager']
+
+
+def get_config():
+    return current_app.config['app_config']
+
+
+@bp.route('', methods=['GET'])
+def list_pipelines():
+    """All pipelines with status and CPU accounting, and the remaining CPU budget"""
+    manager = get_pipeline_manager()
+    return jsonify({'pipelines': manager.list(), 'capacity': manager.capacity()})
+
+
+@bp.route('', methods=['POST'])
+def create_pipeline():
+    """
+    Create and start a pipeline.
+    Body: name, type (v4l2|libcamera), device, ndi_name, resolution, fps, ptz,
+    preview_renditions, scheduling (cpus, nice, realtime_priority, cpu_max,
+    memory_max); force: true skips the CPU admission check.
+    """
+    if not request.is_json:
+        return jsonify({'error': 'JSON body required'}), 400
+
+    data = request.json
+    config = get_config()
+    spec = {
+        'type': data.get('type', 'v4l2'),
+        'device': data.get('device', config.DEFAULT_VIDEO_DEVICE),
+        'ndi_name': data.get('ndi_name'),
+        'resolution': data.get('resolution', config.DEFAULT_RESOLUTION),
+        'fps': data.get('fps', config.DEFAULT_FPS),
+        'ptz': data.get('ptz', False),
+        'preview_renditions': data.get('preview_renditions', config.PREVIEW_RENDITIONS),
+        'scheduling': data.get('scheduling')
+    }
+
+    try:
+        pipeline = get_pipeline_manager().create(data.get('name'), spec, force=bool(data.get('force', False)))
+        return jsonify(pipeline), 201
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except InsufficientCPU as e:
+        return jsonify({
+            'error': str(e),
+            'required_cores': e.required,
+            'available_cores': e.available,
+            'capacity': e.capacity
+        }), 409
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/<name>', methods=['GET'])
+def get_pipeline(name):
+    pipeline = get_pipeline_manager().get(name)
+    if pipeline is None:
+        return jsonify({'error': f'Pipeline not found: {name}'}), 404
+    return jsonify(pipeline)
+
+
+@bp.route('/<name>', methods=['DELETE'])
+def destroy_pipeline(name):
+    """Stop a pipeline and remove its config"""
+    try:
+        if not get_pipeline_manager().destroy(name):
+            return jsonify({'error': f'Pipeline not found: {name}'}), 404
+        return jsonify({'status': 'destroyed', 'name': name})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
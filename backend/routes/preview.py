@@ -1,90 +1,140 @@
 """
 Preview Stream API - MJPEG stream for browser preview
-Reads JPEG frames from ramdisk written by yuri
+Frames written to the ramdisk by yuri are shared between clients by one
+FrameBroadcaster per pipeline (output, viewer_preview) and rendition (thumb, sd, hd)
 """
-import os
-import glob
 import time
-import threading
-from flask import Blueprint, Response, jsonify
+from typing import Optional
+from flask import Blueprint, Response, jsonify, request, current_app
+
+from services.config_generator import DEFAULT_PREVIEW_RENDITION, PREVIEW_RENDITIONS
 
 bp = Blueprint('preview', __name__)
 
-PREVIEW_DIR = '/dev/shm/extrashot_preview'
-PREVIEW_PATTERN = os.path.join(PREVIEW_DIR, 'frame_*.jpg')
-FRAME_INTERVAL = 0.033  # ~30fps
-MAX_FRAMES_TO_KEEP = 5  # Keep only last 5 frames
+WAIT_TIMEOUT = 5.0  # Seconds to wait for a frame before checking the client again
+MIN_FPS = 0.1
+MAX_FPS = 60.0
 
 
-def get_latest_frame():
-    """Get the latest JPEG frame from the preview directory"""
-    try:
-        files = glob.glob(PREVIEW_PATTERN)
-        if not files:
-            return None
+DEFAULT_PIPELINE = 'output'
 
-        # Get the most recently modified file
-        latest = max(files, key=os.path.getmtime)
-        with open(latest, 'rb') as f:
-            return f.read()
-    except Exception:
-        return None
 
+def get_preview_hub():
+    return current_app.config['preview_hub']
 
-def cleanup_old_frames():
-    """Remove old frame files, keeping only the most recent ones"""
-    try:
-        files = glob.glob(PREVIEW_PATTERN)
-        if len(files) > MAX_FRAMES_TO_KEEP:
-            # Sort by modification time
-            files.sort(key=os.path.getmtime)
-            # Remove oldest files
-            for f in files[:-MAX_FRAMES_TO_KEEP]:
-                try:
-                    os.remove(f)
-                except Exception:
-                    pass
-    except Exception:
-        pass
+
+def get_preview_monitors():
+    return [current_app.config['preview_monitor'], current_app.config['output_preview_monitor']]
+
+
+def get_frame_broadcaster(pipeline: str, rendition: str):
+    return get_preview_hub().get(pipeline, rendition)
+
+
+def get_pipeline() -> str:
+    """?pipeline=..., defaulting to the output preview wherever it is currently produced"""
+    pipeline = request.args.get('pipeline')
+    if pipeline:
+        return pipeline
+    output_preview = current_app.config['output_preview_monitor']
+    if not get_preview_hub().has_pipeline(DEFAULT_PIPELINE) and output_preview.source:
+        return output_preview.name
+    return DEFAULT_PIPELINE
 
 
-def generate_mjpeg():
-    """Generator that yields MJPEG frames from the preview directory"""
-    cleanup_counter = 0
+def get_rendition() -> str:
+    return request.args.get('rendition', DEFAULT_PREVIEW_RENDITION)
+
+
+def rendition_error(pipeline: str, rendition: str):
+    """Error response if the pipeline has no preview or does not produce the rendition"""
+    if rendition not in PREVIEW_RENDITIONS:
+        return jsonify({'error': f'Unknown rendition: {rendition}'}), 400
+    hub = get_preview_hub()
+    if not hub.has_pipeline(pipeline):
+        # The output's broadcaster is kept so clients can wait for the output to start
+        if pipeline == DEFAULT_PIPELINE:
+            return None
+        return jsonify({'error': f'No preview for pipeline: {pipeline}'}), 404
+    renditions = hub.renditions(pipeline)
+    if rendition not in renditions:
+        return jsonify({
+            'error': f'Rendition not enabled: {rendition}',
+            'renditions': renditions
+        }), 404
+    return None
+
+
+def generate_mjpeg(broadcaster, max_fps: Optional[float] = None):
+    """
+    Generator that yields frames from the shared broadcaster.
+
+    Only frames this client has not been sent yet are yielded. While the
+    client is rate-capped or its socket is slow to drain, intermediate
+    frames are dropped and the newest one is sent next.
+    """
+    min_interval = 1.0 / max_fps if max_fps else 0.0
+    next_send = 0.0
+    broadcaster.subscribe()
+    seq = 0
     try:
         while True:
-            frame = get_latest_frame()
-            if frame:
-                try:
-                    yield (b'--frame\r\n'
-                           b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
-                except GeneratorExit:
-                    # Client disconnected - exit gracefully
-                    return
-                except (BrokenPipeError, ConnectionResetError, OSError):
-                    # Connection lost - exit gracefully
-                    return
-
-            # Cleanup old frames periodically (every 30 frames)
-            cleanup_counter += 1
-            if cleanup_counter >= 30:
-                cleanup_old_frames()
-                cleanup_counter = 0
-
-            time.sleep(FRAME_INTERVAL)
+            new_seq, frame = broadcaster.wait_for_frame(seq, timeout=WAIT_TIMEOUT)
+            if new_seq == seq:
+                continue
+
+            delay = next_send - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+                # Skip whatever arrived while we were waiting
+                new_seq, frame = broadcaster.latest()
+
+            seq = new_seq
+            if frame is None:
+                continue
+            try:
+                yield (b'--frame\r\n'
+                       b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
+            except GeneratorExit:
+                # Client disconnected - exit gracefully
+                return
+            except (BrokenPipeError, ConnectionResetError, OSError):
+                # Connection lost - exit gracefully
+                return
+            next_send = time.monotonic() + min_interval
     except GeneratorExit:
         # Client disconnected
         pass
     except Exception:
         # Any other error - exit gracefully rather than crash
         pass
+    finally:
+        broadcaster.unsubscribe()
+
+
+def get_max_fps() -> Optional[float]:
+    """Per-client frame-rate cap from ?fps=N"""
+    fps = request.args.get('fps', type=float)
+    if not fps or fps <= 0:
+        return None
+    return min(max(fps, MIN_FPS), MAX_FPS)
 
 
 @bp.route('/stream')
 def stream():
-    """MJPEG stream endpoint"""
+    """
+    MJPEG stream endpoint.
+    ?pipeline=output|output_preview|viewer_preview selects the pipeline, ?rendition=thumb|sd|hd
+    the preview size; ?fps=N caps this client's frame rate.
+    """
+    pipeline = get_pipeline()
+    rendition = get_rendition()
+    error = rendition_error(pipeline, rendition)
+    if error:
+        return error
+
     return Response(
-        generate_mjpeg(),
+        generate_mjpeg(get_frame_broadcaster(pipeline, rendition), max_fps=get_max_fps()),
         mimetype='multipart/x-mixed-replace; boundary=frame'
     )
 
@@ -92,7 +142,13 @@ def stream():
 @bp.route('/snapshot')
 def snapshot():
     """Single frame snapshot"""
-    frame = get_latest_frame()
+    pipeline = get_pipeline()
+    rendition = get_rendition()
+    error = rendition_error(pipeline, rendition)
+    if error:
+        return error
+
+    frame = get_frame_broadcaster(pipeline, rendition).get_frame()
     if frame:
         return Response(frame, mimetype='image/jpeg')
     return jsonify({'error': 'No preview available'}), 404
@@ -100,8 +156,24 @@ def snapshot():
 
 @bp.route('/status')
 def status():
-    """Check if preview is available"""
-    frame = get_latest_frame()
+    """Check if preview is available, per pipeline and rendition"""
+    pipeline = get_pipeline()
+    rendition = get_rendition()
+    available = False
+    if rendition_error(pipeline, rendition) is None:
+        available = get_frame_broadcaster(pipeline, rendition).get_frame() is not None
+    return jsonify({
+        'available': available,
+        'pipeline': pipeline,
+        'rendition': rendition,
+        'pipelines': get_preview_hub().get_state()
+    })
+
+
+@bp.route('/cpu')
+def cpu():
+    """CPU cost of the on-demand previews and the CPU time saved by pausing them"""
     return jsonify({
-        'available': frame is not None
+        monitor.name: {**monitor.get_state(), **monitor.get_cpu_stats()}
+        for monitor in get_preview_monitors()
     })
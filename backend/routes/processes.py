@@ -0,0 +1,96 @@
+"""
+Process API Routes - Status, captured output and resource usage of yuri processes
+"""
+from flask import Blueprint, Response, jsonify, request, current_app
+
+from services.event_bus import format_sse
+from services.process_log import STREAMS
+
+bp = Blueprint('processes', __name__)
+
+KEEPALIVE_INTERVAL = 15  # Seconds between keep-alive comments while following a log
+
+
+def get_yuri_manager():
+    return current_app.config['yuri_manager']
+
+
+def get_process_sampler():
+    return current_app.config['process_sampler']
+
+
+@bp.route('', methods=['GET'])
+def list_processes():
+    """Status of every managed process"""
+    return jsonify({'processes': get_yuri_manager().get_all_status()})
+
+
+@bp.route('/<name>/metrics', methods=['GET'])
+def process_metrics(name):
+    """
+    Resource usage time series of a process: CPU %, RSS, context switches,
+    threads (with per-thread CPU %) and I/O per sample, with the SoC
+    temperature and throttling flags. ?samples=N returns the last N only.
+    """
+    try:
+        count = int(request.args.get('samples', 0))
+    except ValueError:
+        return jsonify({'error': 'samples must be an integer'}), 400
+    metrics = get_process_sampler().get_metrics(name, count or None)
+    if metrics is None:
+        return jsonify({'error': f"No metrics sampled for '{name}'"}), 404
+    return jsonify(metrics)
+
+
+def follow_log(log, after: int, stream):
+    """Generator that yields log lines newer than `after` as Server-Sent Events as they are written"""
+    try:
+        while True:
+            if log.wait(after, timeout=KEEPALIVE_INTERVAL) == after:
+                # Comment line keeps proxies and the browser from timing out
+                yield ': keepalive\n\n'
+                continue
+            lines = log.tail(after=after)
+            for line in lines:
+                if stream is None or line['stream'] == stream:
+                    yield format_sse('log', line)
+            if lines:
+                after = lines[-1]['seq']
+    except GeneratorExit:
+        # Client disconnected
+        pass
+
+
+@bp.route('/<name>/logs', methods=['GET'])
+def process_logs(name):
+    """
+    Captured stdout/stderr of a process (kept across restarts).
+    ?lines=N tail length, ?after=<seq> only newer lines, ?stream=stdout|stderr|system,
+    ?follow=1 keeps the response open and streams new lines as Server-Sent Events.
+    """
+    log = get_yuri_manager().get_log(name)
+    if log is None:
+        return jsonify({'error': f"No output captured for '{name}'"}), 404
+
+    stream = request.args.get('stream')
+    if stream is not None and stream not in STREAMS:
+        return jsonify({'error': f"stream must be one of: {', '.join(STREAMS)}"}), 400
+    try:
+        count = int(request.args.get('lines', 200))
+        after = int(request.args.get('after', 0))
+    except ValueError:
+        return jsonify({'error': 'lines and after must be integers'}), 400
+
+    lines = log.tail(count, after=after, stream=stream)
+    if request.args.get('follow', '').lower() not in ('1', 'true', 'yes'):
+        return jsonify({'name': name, 'lines': lines, 'last_seq': log.seq})
+
+    def generate():
+        for line in lines:
+            yield format_sse('log', line)
+        yield from follow_log(log, lines[-1]['seq'] if lines else max(after, log.seq), stream)
+
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
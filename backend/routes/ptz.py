@@ -1,17 +1,91 @@
 """
 PTZ Control API Routes
+Every command route is also available per camera as /api/ptz/<target>/...
 """
-from flask import Blueprint, jsonify, request, current_app
+import json
+from typing import Optional
+from flask import Blueprint, Response, jsonify, request, current_app
+from flask_sock import Sock
+
+from services.ptz_channel import PTZChannel, execute_batch
+from services.ptz_registry import UnknownPTZTarget, DEFAULT_TARGET
+from services.ptz_controller import POSITION_AXES
 
 bp = Blueprint('ptz', __name__)
+sock = Sock()
+
+
+def get_ptz_registry():
+    return current_app.config['ptz_registry']
+
+
+def get_ptz_controller(target: Optional[str] = None):
+    """Controller for /api/ptz/<target>/...; the local yuri graph without a target"""
+    return get_ptz_registry().get(target)
+
+
+def get_preset_store():
+    return current_app.config['ptz_presets']
+
+
+def get_config():
+    return current_app.config['app_config']
+
+
+@bp.errorhandler(UnknownPTZTarget)
+def unknown_target(e):
+    return jsonify({'error': f'Unknown PTZ target: {e.args[0]}'}), 404
 
 
-def get_ptz_controller():
-    return current_app.config['ptz_controller']
+def get_session_user():
+    """Username for the request's auth cookie or bearer token, or None"""
+    token = request.headers.get('Authorization', '').replace('Bearer ', '')
+    if not token:
+        token = request.cookies.get('auth_token')
+    return current_app.config['auth_service'].validate_session(token)
+
+
+def ws(socket, target=None):
+    """
+    Persistent PTZ channel. Authenticated once at connect; then each text
+    frame is one JSON command (see services.ptz_channel.execute_command),
+    acknowledged on the same socket.
+    """
+    if not get_session_user():
+        socket.close(reason=1008, message='Unauthorized')
+        return
+    try:
+        ptz = get_ptz_controller(target)
+    except UnknownPTZTarget:
+        socket.close(reason=1008, message=f'Unknown PTZ target: {target}')
+        return
+
+    channel = PTZChannel(ptz, lambda message: socket.send(json.dumps(message)))
+    try:
+        while True:
+            data = socket.receive()
+            if data is None:
+                continue
+            try:
+                command = json.loads(data)
+            except ValueError:
+                socket.send(json.dumps({'ok': False, 'error': 'Invalid JSON'}))
+                continue
+            if not isinstance(command, dict):
+                socket.send(json.dumps({'ok': False, 'error': 'Command must be an object'}))
+                continue
+            channel.submit(command)
+    finally:
+        channel.close()
+
+
+sock.route('/ws', bp=bp)(ws)
+sock.route('/<target>/ws', bp=bp, endpoint='target_ws')(ws)
 
 
 @bp.route('/move', methods=['POST'])
-def move():
+@bp.route('/<target>/move', methods=['POST'])
+def move(target=None):
     """Continuous move with speed"""
     if not request.is_json:
         return jsonify({'error': 'JSON body required'}), 400
@@ -20,19 +94,50 @@ def move():
     pan_speed = float(data.get('pan_speed', 0))
     tilt_speed = float(data.get('tilt_speed', 0))
 
-    success = get_ptz_controller().set_pan_tilt_speed(pan_speed, tilt_speed)
+    # With lease_ms the camera stops by itself unless the move is repeated within the lease
+    if data.get('lease_ms'):
+        success = get_ptz_controller(target).move_with_lease(pan_speed, tilt_speed, float(data['lease_ms']))
+    else:
+        success = get_ptz_controller(target).set_pan_tilt_speed(pan_speed, tilt_speed)
     return jsonify({'status': 'ok' if success else 'failed'})
 
 
+@bp.route('/batch', methods=['POST'])
+@bp.route('/<target>/batch', methods=['POST'])
+def batch(target=None):
+    """
+    Apply an ordered list of commands (same format as the WebSocket channel)
+    in one request, e.g. to recall a whole look. Returns one result per command.
+    """
+    if not request.is_json:
+        return jsonify({'error': 'JSON body required'}), 400
+
+    data = request.json
+    commands = data.get('commands')
+    if not isinstance(commands, list) or not commands or not all(isinstance(c, dict) for c in commands):
+        return jsonify({'error': 'commands must be a non-empty list of objects'}), 400
+    single_request = data.get('single_request', current_app.config['app_config'].PTZ_BATCH_SINGLE_REQUEST)
+
+    try:
+        results = execute_batch(get_ptz_controller(target), commands, single_request=bool(single_request))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    success = all(result['status'] == 'ok' for result in results)
+    return jsonify({'status': 'ok' if success else 'failed', 'results': results})
+
+
 @bp.route('/stop', methods=['POST'])
-def stop():
+@bp.route('/<target>/stop', methods=['POST'])
+def stop(target=None):
     """Stop all movement"""
-    success = get_ptz_controller().stop()
+    success = get_ptz_controller(target).stop()
     return jsonify({'status': 'stopped' if success else 'failed'})
 
 
 @bp.route('/position', methods=['POST'])
-def set_position():
+@bp.route('/<target>/position', methods=['POST'])
+def set_position(target=None):
     """Set absolute pan/tilt position"""
     if not request.is_json:
         return jsonify({'error': 'JSON body required'}), 400
@@ -41,20 +146,23 @@ def set_position():
     pan = float(data.get('pan', 0))
     tilt = float(data.get('tilt', 0))
 
-    success = get_ptz_controller().set_pan_tilt(pan, tilt)
+    success = get_ptz_controller(target).set_pan_tilt(pan, tilt)
     return jsonify({'status': 'ok' if success else 'failed'})
 
 
 @bp.route('/zoom', methods=['POST'])
-def zoom():
+@bp.route('/<target>/zoom', methods=['POST'])
+def zoom(target=None):
     """Set zoom speed or level"""
     if not request.is_json:
         return jsonify({'error': 'JSON body required'}), 400
 
     data = request.json
-    ptz = get_ptz_controller()
+    ptz = get_ptz_controller(target)
 
-    if 'speed' in data:
+    if 'speed' in data and data.get('lease_ms'):
+        success = ptz.zoom_with_lease(float(data['speed']), float(data['lease_ms']))
+    elif 'speed' in data:
         success = ptz.set_zoom_speed(float(data['speed']))
     elif 'level' in data:
         success = ptz.set_zoom(float(data['level']))
@@ -65,7 +173,8 @@ def zoom():
 
 
 @bp.route('/preset/recall', methods=['POST'])
-def recall_preset():
+@bp.route('/<target>/preset/recall', methods=['POST'])
+def recall_preset(target=None):
     """Recall a preset"""
     if not request.is_json:
         return jsonify({'error': 'JSON body required'}), 400
@@ -73,32 +182,97 @@ def recall_preset():
     data = request.json
     preset = int(data.get('preset', 0))
     speed = float(data.get('speed', 1.0))
+    mode = data.get('mode', get_config().PTZ_PRESET_RECALL_MODE)
+    ptz = get_ptz_controller(target)
+    stored = get_preset_store().get_preset(target or DEFAULT_TARGET, preset)
+
+    if mode == 'interpolated':
+        # Server-driven move from the stored position; never asks the camera for the preset
+        duration = float(data.get('duration', get_config().PTZ_PRESET_DURATION))
+        if not stored or not ptz.glide_to(stored, duration, tick_hz=get_config().PTZ_PRESET_TICK_HZ,
+                                          single_request=get_config().PTZ_BATCH_SINGLE_REQUEST):
+            return jsonify({'error': f'Preset {preset} has no stored position'}), 404
+        return jsonify({'status': 'ok', 'mode': mode, 'duration': duration, 'preset': stored})
+    if mode != 'native':
+        return jsonify({'error': f'Unknown mode: {mode}'}), 400
 
-    success = get_ptz_controller().recall_preset(preset, speed)
-    return jsonify({'status': 'ok' if success else 'failed'})
+    success = ptz.recall_preset(preset, speed)
+    if success and stored:
+        ptz.set_known_position(stored)
+    return jsonify({'status': 'ok' if success else 'failed', 'mode': mode, 'preset': stored})
 
 
 @bp.route('/preset/store', methods=['POST'])
-def store_preset():
-    """Store current position as preset"""
+@bp.route('/<target>/preset/store', methods=['POST'])
+def store_preset(target=None):
+    """
+    Store current position as preset, on the camera and in the server-side
+    store (last commanded position, overridden by any pan/tilt/zoom/focus in the body)
+    """
     if not request.is_json:
         return jsonify({'error': 'JSON body required'}), 400
 
     data = request.json
     preset = int(data.get('preset', 0))
+    ptz = get_ptz_controller(target)
+
+    success = ptz.store_preset(preset) if data.get('native', True) else True
+    position = ptz.get_position()
+    position.update({axis: data[axis] for axis in POSITION_AXES if data.get(axis) is not None})
+    try:
+        stored = get_preset_store().set_preset(target or DEFAULT_TARGET, preset, position, data.get('name'))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'status': 'ok' if success else 'failed', 'preset': stored})
+
+
+@bp.route('/presets', methods=['GET'])
+@bp.route('/<target>/presets', methods=['GET'])
+def list_presets(target=None):
+    """Presets stored for a camera, served from memory"""
+    get_ptz_controller(target)  # 404 for unknown targets
+    return jsonify({'presets': get_preset_store().list_presets(target or DEFAULT_TARGET)})
+
+
+@bp.route('/presets/<int:preset>', methods=['GET', 'PUT', 'DELETE'])
+@bp.route('/<target>/presets/<int:preset>', methods=['GET', 'PUT', 'DELETE'])
+def preset_entry(preset, target=None):
+    """Get, set (without touching the camera) or delete a stored preset"""
+    get_ptz_controller(target)
+    store = get_preset_store()
+    target = target or DEFAULT_TARGET
+
+    if request.method == 'GET':
+        entry = store.get_preset(target, preset)
+        if not entry:
+            return jsonify({'error': f'Preset {preset} not found'}), 404
+        return jsonify(entry)
+
+    if request.method == 'DELETE':
+        if not store.delete_preset(target, preset):
+            return jsonify({'error': f'Preset {preset} not found'}), 404
+        return jsonify({'status': 'deleted', 'preset': preset})
 
-    success = get_ptz_controller().store_preset(preset)
-    return jsonify({'status': 'ok' if success else 'failed'})
+    if not request.is_json:
+        return jsonify({'error': 'JSON body required'}), 400
+    data = request.json
+    try:
+        position = {axis: data.get(axis) for axis in POSITION_AXES}
+        # Axes left out of the body keep their stored value
+        return jsonify(store.set_preset(target, preset, position, data.get('name'), merge=True))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
 
 
 @bp.route('/focus', methods=['POST'])
-def focus():
+@bp.route('/<target>/focus', methods=['POST'])
+def focus(target=None):
     """Focus control"""
     if not request.is_json:
         return jsonify({'error': 'JSON body required'}), 400
 
     data = request.json
-    ptz = get_ptz_controller()
+    ptz = get_ptz_controller(target)
 
     if data.get('auto'):
         success = ptz.auto_focus()
@@ -113,14 +287,15 @@ def focus():
 
 
 @bp.route('/whitebalance', methods=['POST'])
-def white_balance():
+@bp.route('/<target>/whitebalance', methods=['POST'])
+def white_balance(target=None):
     """White balance control"""
     if not request.is_json:
         return jsonify({'error': 'JSON body required'}), 400
 
     data = request.json
     mode = data.get('mode', 'auto')
-    ptz = get_ptz_controller()
+    ptz = get_ptz_controller(target)
 
     if mode == 'auto':
         success = ptz.white_balance_auto()
@@ -141,13 +316,14 @@ def white_balance():
 
 
 @bp.route('/exposure', methods=['POST'])
-def exposure():
+@bp.route('/<target>/exposure', methods=['POST'])
+def exposure(target=None):
     """Exposure control"""
     if not request.is_json:
         return jsonify({'error': 'JSON body required'}), 400
 
     data = request.json
-    ptz = get_ptz_controller()
+    ptz = get_ptz_controller(target)
 
     if data.get('auto'):
         success = ptz.exposure_auto()
@@ -157,3 +333,56 @@ def exposure():
         return jsonify({'error': 'auto or level required'}), 400
 
     return jsonify({'status': 'ok' if success else 'failed'})
+
+
+@bp.route('/metrics', methods=['GET'])
+@bp.route('/<target>/metrics', methods=['GET'])
+def metrics(target=None):
+    """
+    Per-command latency (request = round trip to yuri, command = including
+    queueing in the controller), failure/timeout counters and queue gauges
+    """
+    return jsonify({'targets': get_ptz_registry().get_metrics(target)})
+
+
+@bp.route('/metrics/prometheus', methods=['GET'])
+def prometheus_metrics():
+    """The same metrics for every target in Prometheus text format"""
+    return Response(get_ptz_registry().get_prometheus_metrics(),
+                    content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@bp.route('/targets', methods=['GET'])
+def list_targets():
+    """List PTZ targets and their control endpoints"""
+    return jsonify({'targets': get_ptz_registry().list_targets()})
+
+
+@bp.route('/targets', methods=['POST'])
+def set_target():
+    """Add a PTZ target or change its control URL"""
+    if not request.is_json:
+        return jsonify({'error': 'JSON body required'}), 400
+
+    data = request.json
+    name = data.get('name', '').strip()
+    url = data.get('url', '').strip()
+    if not name or not url:
+        return jsonify({'error': 'name and url are required'}), 400
+    if '/' in name:
+        return jsonify({'error': 'name must not contain /'}), 400
+
+    try:
+        get_ptz_registry().set_target(name, url)
+        return jsonify({'targets': get_ptz_registry().list_targets()})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/targets/<name>', methods=['DELETE'])
+def remove_target(name):
+    """Remove a PTZ target and its stored presets"""
+    if not get_ptz_registry().remove_target(name):
+        return jsonify({'error': f'Cannot remove PTZ target: {name}'}), 400
+    get_preset_store().delete_target(name)
+    return jsonify({'targets': get_ptz_registry().list_targets()})
@@ -12,23 +12,28 @@ def get_discovery_service():
 
 @bp.route('/', methods=['GET'])
 def list_sources():
-    """List all discovered NDI sources"""
-    try:
-        sources = get_discovery_service().discover_sources()
-        return jsonify({'sources': sources, 'count': len(sources)})
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    """List all discovered NDI sources from the discovery cache"""
+    discovery = get_discovery_service()
+    sources = discovery.list_sources()
+    return jsonify({
+        'sources': sources,
+        'count': len(sources),
+        'discovery': discovery.get_state()
+    })
 
 
 @bp.route('/refresh', methods=['POST'])
 def refresh_sources():
-    """Force refresh of NDI sources"""
-    try:
-        timeout = request.json.get('timeout', 8) if request.is_json else 8
-        sources = get_discovery_service().discover_sources(timeout=timeout)
-        return jsonify({'sources': sources, 'count': len(sources)})
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    """Ask the discovery worker for a new run; returns the current cache immediately"""
+    discovery = get_discovery_service()
+    discovery.request_refresh()
+    sources = discovery.list_sources()
+    return jsonify({
+        'status': 'refreshing',
+        'sources': sources,
+        'count': len(sources),
+        'discovery': discovery.get_state()
+    }), 202
 
 
 @bp.route('/extra-ips', methods=['GET'])
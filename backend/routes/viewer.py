@@ -16,6 +16,24 @@ def get_config_generator():
     return current_app.config['config_generator']
 
 
+def get_preview_monitor():
+    return current_app.config['preview_monitor']
+
+
+def get_viewer_switcher():
+    return current_app.config['viewer_switcher']
+
+
+def viewer_options(data) -> dict:
+    """generate_viewer_config options (everything but the source) from a request body"""
+    return {
+        'backup_source': data.get('backup'),
+        'audio_enabled': data.get('audio', False),
+        'fullscreen': data.get('fullscreen', True),
+        'resolution': data.get('resolution', '1920x1080')
+    }
+
+
 @bp.route('/start', methods=['POST'])
 def start_viewer():
     """Start viewing an NDI source"""
@@ -27,23 +45,24 @@ def start_viewer():
     if not source_name:
         return jsonify({'error': 'source is required'}), 400
 
-    backup_source = data.get('backup')
-    audio = data.get('audio', False)
-    fullscreen = data.get('fullscreen', True)
-    resolution = data.get('resolution', '1920x1080')
+    options = viewer_options(data)
+    # Without wait the response returns once yuri is launched; readiness follows via status/events
+    wait = bool(data.get('wait', True))
+    try:
+        scheduling = get_yuri_manager().scheduling_for(data.get('scheduling'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
     try:
-        config_path = get_config_generator().generate_viewer_config(
-            ndi_source=source_name,
-            backup_source=backup_source,
-            audio_enabled=audio,
-            fullscreen=fullscreen,
-            resolution=resolution
-        )
-
-        result = get_yuri_manager().start_process(VIEWER_PROCESS_NAME, config_path)
+        config_path = get_config_generator().generate_viewer_config(ndi_source=source_name, **options)
+
+        get_yuri_manager().set_source(VIEWER_PROCESS_NAME, source_name)
+        result = get_yuri_manager().start_process(VIEWER_PROCESS_NAME, config_path, wait=wait,
+                                                  scheduling=scheduling)
+        get_viewer_switcher().started(source_name)
+        get_preview_monitor().set_source(source_name)
         result['source'] = source_name
-        return jsonify(result)
+        return jsonify(result), 200 if wait else 202
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -53,6 +72,8 @@ def stop_viewer():
     """Stop the viewer"""
     try:
         result = get_yuri_manager().stop_process(VIEWER_PROCESS_NAME)
+        get_viewer_switcher().started(None)
+        get_preview_monitor().set_source(None)
         return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -60,7 +81,7 @@ def stop_viewer():
 
 @bp.route('/switch', methods=['POST'])
 def switch_source():
-    """Switch to a different NDI source"""
+    """Switch to a different NDI source by restarting the viewer (see services.viewer_switcher)"""
     if not request.is_json:
         return jsonify({'error': 'JSON body required'}), 400
 
@@ -69,23 +90,17 @@ def switch_source():
     if not source_name:
         return jsonify({'error': 'source is required'}), 400
 
-    backup_source = data.get('backup')
-    audio = data.get('audio', False)
-    fullscreen = data.get('fullscreen', True)
-    resolution = data.get('resolution', '1920x1080')
+    options = viewer_options(data)
+    # Without wait the response returns once yuri is launched; readiness follows via status/events
+    wait = bool(data.get('wait', True))
 
     try:
-        config_path = get_config_generator().generate_viewer_config(
-            ndi_source=source_name,
-            backup_source=backup_source,
-            audio_enabled=audio,
-            fullscreen=fullscreen,
-            resolution=resolution
-        )
-
-        result = get_yuri_manager().restart_process(VIEWER_PROCESS_NAME, config_path)
+        config_path = get_config_generator().generate_viewer_config(ndi_source=source_name, **options)
+
+        result = get_viewer_switcher().switch(config_path, source_name, wait=wait)
+        get_preview_monitor().set_source(source_name)
         result['source'] = source_name
-        return jsonify(result)
+        return jsonify(result), 202 if result['status'] == 'starting' else 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
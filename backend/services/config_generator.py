@@ -3,20 +3,36 @@ Config Generator - Generates yuri XML configs from templates
 """
 import os
 from jinja2 import Environment, FileSystemLoader
-from typing import Optional
+from typing import Optional, List, Dict
 import logging
 
 logger = logging.getLogger(__name__)
 
+PREVIEW_DIR = '/dev/shm/extrashot_preview'
+
+# Preview renditions that can be branched off a pipeline (see templates/_preview.xml.j2).
+# Frames of each rendition are written as <name>_NNNNNN.jpg in the pipeline's preview directory.
+PREVIEW_RENDITIONS: Dict[str, Dict] = {
+    'thumb': {'resolution': '320x180', 'quality': 60},
+    'sd': {'resolution': '640x360', 'quality': 75},
+    'hd': {'resolution': '1280x720', 'quality': 85},
+}
+DEFAULT_PREVIEW_RENDITION = 'sd'
+
 
 class ConfigGenerator:
     """Generates yuri XML configuration files from Jinja2 templates"""
 
-    def __init__(self, template_dir: str, output_dir: str):
+    def __init__(self, template_dir: str, output_dir: str, preview_root: str = PREVIEW_DIR):
         self.env = Environment(loader=FileSystemLoader(template_dir))
         self.output_dir = output_dir
+        self.preview_root = preview_root
         os.makedirs(output_dir, exist_ok=True)
 
+    def preview_dir(self, pipeline: str) -> str:
+        """Directory a pipeline's preview branches write into"""
+        return os.path.join(self.preview_root, pipeline)
+
     def generate_viewer_config(
         self,
         ndi_source: str,
@@ -42,25 +58,47 @@ class ConfigGenerator:
         logger.info(f"Generated viewer config: {output_path}")
         return output_path
 
+    def _preview_branches(self, renditions: Optional[List[str]]) -> List[Dict]:
+        """Resolve rendition names into template parameters"""
+        if renditions is None:
+            renditions = [DEFAULT_PREVIEW_RENDITION]
+
+        branches = []
+        for name in renditions:
+            if name not in PREVIEW_RENDITIONS:
+                raise ValueError(f"Unknown preview rendition: {name}")
+            if any(b['name'] == name for b in branches):
+                continue
+            branches.append({'name': name, **PREVIEW_RENDITIONS[name]})
+        return branches
+
     def generate_v4l2_output_config(
         self,
         device_path: str = '/dev/video0',
         output_name: str = 'RaspberryPi-NDI',
         resolution: str = '1920x1080',
         fps: int = 30,
-        ptz_enabled: bool = False
+        ptz_enabled: bool = False,
+        preview_renditions: Optional[List[str]] = None,
+        preview_name: str = 'output',
+        config_name: str = 'output_v4l2'
     ) -> str:
-        """Generate V4L2 to NDI output XML config"""
+        """
+        Generate V4L2 to NDI output XML config (written to <config_name>.xml).
+        One scaled JPEG preview branch is emitted per entry in preview_renditions.
+        """
         template = self.env.get_template('output_v4l2.xml.j2')
         config = template.render(
             device_path=device_path,
             output_name=output_name,
             resolution=resolution,
             fps=fps,
-            ptz_enabled='true' if ptz_enabled else 'false'
+            ptz_enabled='true' if ptz_enabled else 'false',
+            preview_branches=self._preview_branches(preview_renditions),
+            preview_dir=self.preview_dir(preview_name)
         )
 
-        output_path = os.path.join(self.output_dir, 'output_v4l2.xml')
+        output_path = os.path.join(self.output_dir, f'{config_name}.xml')
         with open(output_path, 'w') as f:
             f.write(config)
 
@@ -72,20 +110,53 @@ class ConfigGenerator:
         output_name: str = 'RaspberryPi-PiCam',
         resolution: str = '1920x1080',
         fps: int = 30,
-        ptz_enabled: bool = False
+        ptz_enabled: bool = False,
+        preview_renditions: Optional[List[str]] = None,
+        preview_name: str = 'output',
+        config_name: str = 'output_libcamera'
     ) -> str:
-        """Generate libcamera (Pi Camera) to NDI output XML config"""
+        """
+        Generate libcamera (Pi Camera) to NDI output XML config (written to <config_name>.xml).
+        Preview branches are attached the same way as for V4L2 output.
+        """
         template = self.env.get_template('output_libcamera.xml.j2')
         config = template.render(
             output_name=output_name,
             resolution=resolution,
             fps=fps,
-            ptz_enabled='true' if ptz_enabled else 'false'
+            ptz_enabled='true' if ptz_enabled else 'false',
+            preview_branches=self._preview_branches(preview_renditions),
+            preview_dir=self.preview_dir(preview_name)
         )
 
-        output_path = os.path.join(self.output_dir, 'output_libcamera.xml')
+        output_path = os.path.join(self.output_dir, f'{config_name}.xml')
         with open(output_path, 'w') as f:
             f.write(config)
 
         logger.info(f"Generated libcamera output config: {output_path}")
         return output_path
+
+    def generate_ndi_preview_config(
+        self,
+        ndi_source: str,
+        preview_renditions: Optional[List[str]] = None,
+        preview_name: str = 'viewer_preview'
+    ) -> str:
+        """Generate a preview-only graph for an NDI source (receiver + preview branches)"""
+        branches = self._preview_branches(preview_renditions)
+        if not branches:
+            raise ValueError("At least one preview rendition is required")
+
+        template = self.env.get_template('preview_ndi.xml.j2')
+        config = template.render(
+            ndi_source=ndi_source,
+            preview_branches=branches,
+            preview_dir=self.preview_dir(preview_name)
+        )
+
+        output_path = os.path.join(self.output_dir, f'{preview_name}.xml')
+        with open(output_path, 'w') as f:
+            f.write(config)
+
+        logger.info(f"Generated NDI preview config: {output_path}")
+        return output_path
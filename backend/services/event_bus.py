@@ -0,0 +1,66 @@
+"""
+Event Bus - Fans out server-side state changes to Server-Sent Events clients
+"""
+import json
+import queue
+from typing import Dict, List
+from threading import Lock
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class EventBus:
+    """
+    In-process publish/subscribe hub.
+
+    Each subscriber gets its own bounded queue. A publisher never blocks: if a
+    subscriber falls behind, its oldest pending event is dropped.
+    """
+
+    def __init__(self, max_queue: int = 100):
+        self.max_queue = max_queue
+        self.subscribers: List[queue.Queue] = []
+        self.lock = Lock()
+
+    def subscribe(self) -> queue.Queue:
+        """Register a new subscriber and return its event queue"""
+        q = queue.Queue(maxsize=self.max_queue)
+        with self.lock:
+            self.subscribers.append(q)
+        logger.debug(f"Event subscriber added ({len(self.subscribers)} total)")
+        return q
+
+    def unsubscribe(self, q: queue.Queue):
+        """Remove a subscriber"""
+        with self.lock:
+            if q in self.subscribers:
+                self.subscribers.remove(q)
+        logger.debug(f"Event subscriber removed ({len(self.subscribers)} total)")
+
+    @property
+    def subscriber_count(self) -> int:
+        with self.lock:
+            return len(self.subscribers)
+
+    def publish(self, event: str, data: Dict):
+        """Send an event to every subscriber"""
+        with self.lock:
+            subscribers = list(self.subscribers)
+
+        for q in subscribers:
+            try:
+                q.put_nowait((event, data))
+            except queue.Full:
+                # Slow client: drop its oldest event to make room
+                try:
+                    q.get_nowait()
+                    q.put_nowait((event, data))
+                except (queue.Empty, queue.Full):
+                    pass
+
+
+def format_sse(event: str, data: Dict) -> str:
+    """Format an event as a Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
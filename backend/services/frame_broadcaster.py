@@ -0,0 +1,276 @@
+"""
+Frame Broadcaster - Shares preview frames written by yuri between all MJPEG clients
+"""
+import os
+import glob
+import time
+import fnmatch
+import threading
+from typing import Optional, Tuple, Callable
+import logging
+
+from services.inotify import (
+    Inotify, inotify_available,
+    IN_CLOSE_WRITE, IN_MOVED_TO, IN_DELETE_SELF, IN_MOVE_SELF, IN_IGNORED, IN_ONLYDIR
+)
+
+logger = logging.getLogger(__name__)
+
+FRAME_INTERVAL = 0.033  # ~30fps, polling fallback only
+MAX_FRAMES_TO_KEEP = 5  # Polling fallback only
+WATCH_TIMEOUT = 0.5  # Seconds between producer housekeeping checks
+
+
+class FrameBroadcaster:
+    """
+    Single producer for preview frames.
+
+    One background thread detects each new JPEG in the preview directory,
+    reads it once and keeps it in memory as an immutable bytes object with a
+    sequence number. Subscribers block on a condition until the sequence
+    number moves past the last frame they sent.
+
+    New frames are detected with inotify (IN_CLOSE_WRITE / IN_MOVED_TO), so
+    a frame is only picked up once yuri has finished writing it, and the
+    superseded file is deleted straight away. Where inotify is unavailable
+    the directory is polled instead.
+
+    The producer runs while a client is subscribed or while the preview is
+    active; without subscribers it only deletes superseded frames.
+    """
+
+    def __init__(self, preview_dir: str, pattern: str = 'frame_*.jpg',
+                 on_subscribers_changed: Optional[Callable[[int], None]] = None):
+        self.preview_dir = preview_dir
+        self.file_pattern = pattern
+        self.pattern = os.path.join(preview_dir, pattern)
+        self.condition = threading.Condition()
+        self.frame: Optional[bytes] = None
+        self.seq = 0
+        self.frame_time: Optional[float] = None
+        self.latest_path: Optional[str] = None
+        self.subscribers = 0
+        self.active = False
+        self.use_inotify = inotify_available()
+        self.on_subscribers_changed = on_subscribers_changed
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self):
+        """Register a client; starts the producer if it is not running"""
+        with self.condition:
+            self.subscribers += 1
+            count = self.subscribers
+            self._ensure_producer()
+        if self.on_subscribers_changed:
+            self.on_subscribers_changed(count)
+
+    def unsubscribe(self):
+        """Unregister a client"""
+        with self.condition:
+            self.subscribers = max(0, self.subscribers - 1)
+            count = self.subscribers
+            self.condition.notify_all()
+        if self.on_subscribers_changed:
+            self.on_subscribers_changed(count)
+
+    def set_active(self, active: bool):
+        """Called when the preview pipeline starts or stops"""
+        with self.condition:
+            self.active = active
+            if not active:
+                self.latest_path = None
+                self._publish_locked(None)
+            self._ensure_producer()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def wait_for_frame(self, last_seq: int, timeout: Optional[float] = None) -> Tuple[int, Optional[bytes]]:
+        """
+        Block until a frame newer than last_seq is available.
+        Returns (seq, frame); seq equals last_seq if the timeout expired first.
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.seq != last_seq, timeout)
+            return self.seq, self.frame
+
+    def latest(self) -> Tuple[int, Optional[bytes]]:
+        """Current (seq, frame) without waiting"""
+        with self.condition:
+            return self.seq, self.frame
+
+    def get_frame(self) -> Optional[bytes]:
+        """Latest frame; read from disk when no client keeps it in memory"""
+        with self.condition:
+            if self.frame is not None and self.subscribers:
+                return self.frame
+            path = self.latest_path
+        if path is None:
+            path = self._find_latest()
+        return self._read(path) if path else None
+
+    def _ensure_producer(self):
+        """Start the producer thread if needed (caller holds the condition)"""
+        if self._should_run() and (self._thread is None or not self._thread.is_alive()):
+            self._thread = threading.Thread(target=self._run, name='preview-broadcaster', daemon=True)
+            self._thread.start()
+
+    def _should_run(self) -> bool:
+        return self.subscribers > 0 or self.active
+
+    def _publish_locked(self, frame: Optional[bytes]):
+        self.frame = frame
+        self.seq += 1
+        self.frame_time = time.time()
+        self.condition.notify_all()
+
+    def _publish(self, frame: Optional[bytes]):
+        """Store a new frame and wake all subscribers"""
+        with self.condition:
+            self._publish_locked(frame)
+
+    def _find_latest(self) -> Optional[str]:
+        """Path of the most recently modified frame file"""
+        try:
+            files = glob.glob(self.pattern)
+            if not files:
+                return None
+            return max(files, key=os.path.getmtime)
+        except OSError:
+            return None
+
+    def _read(self, path: str) -> Optional[bytes]:
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _handle_frame(self, path: str):
+        """A complete frame was written: fan it out and delete the one it supersedes"""
+        with self.condition:
+            previous = self.latest_path
+            self.latest_path = path
+            wanted = self.subscribers > 0
+
+        if wanted:
+            frame = self._read(path)
+            if frame:
+                self._publish(frame)
+
+        if previous and previous != path:
+            self._remove(previous)
+
+    def _keep_running(self) -> bool:
+        """Check whether to continue; clears the thread under the lock when exiting"""
+        with self.condition:
+            if self._should_run():
+                return True
+            # Decided under the lock so subscribe() never sees a dying producer
+            self._thread = None
+            return False
+
+    def _run(self):
+        """Producer loop"""
+        logger.info(f"Preview broadcaster started ({'inotify' if self.use_inotify else 'polling'})")
+        try:
+            if self.use_inotify:
+                self._run_inotify()
+            else:
+                self._run_polling()
+        except Exception as e:
+            logger.error(f"Preview broadcaster error: {e}")
+            with self.condition:
+                self._thread = None
+        logger.info("Preview broadcaster stopped")
+
+    def _run_inotify(self):
+        """Detect complete frames via inotify events"""
+        inotify = Inotify()
+        wd = None
+        try:
+            while self._keep_running():
+                if wd is None:
+                    if not os.path.isdir(self.preview_dir):
+                        time.sleep(WATCH_TIMEOUT)
+                        continue
+                    wd = inotify.add_watch(
+                        self.preview_dir,
+                        IN_CLOSE_WRITE | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+                    )
+                    # Pick up a frame written before the watch existed and drop older ones
+                    latest = self._find_latest()
+                    if latest:
+                        for path in glob.glob(self.pattern):
+                            if path != latest:
+                                self._remove(path)
+                        self._handle_frame(latest)
+
+                completed = []
+                for event_wd, mask, name in inotify.read_events(WATCH_TIMEOUT):
+                    if event_wd != wd:
+                        continue
+                    if mask & (IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF):
+                        # Directory went away; re-add the watch once it is back
+                        wd = None
+                        with self.condition:
+                            self.latest_path = None
+                        self._publish(None)
+                        break
+                    if mask & (IN_CLOSE_WRITE | IN_MOVED_TO) and fnmatch.fnmatch(name, self.file_pattern):
+                        completed.append(name)
+
+                if completed:
+                    # Sequence-numbered names sort in write order; older ones in the batch are already stale
+                    completed.sort()
+                    for name in completed[:-1]:
+                        self._remove(os.path.join(self.preview_dir, name))
+                    self._handle_frame(os.path.join(self.preview_dir, completed[-1]))
+        finally:
+            inotify.close()
+
+    def _run_polling(self):
+        """Fallback: poll the directory for the newest frame"""
+        last_key = None
+        cleanup_counter = 0
+        while self._keep_running():
+            latest = self._find_latest()
+            if latest is not None:
+                try:
+                    key = (latest, os.path.getmtime(latest))
+                except OSError:
+                    key = last_key
+                if key != last_key:
+                    last_key = key
+                    with self.condition:
+                        self.latest_path = latest
+                        wanted = self.subscribers > 0
+                    if wanted:
+                        frame = self._read(latest)
+                        if frame:
+                            self._publish(frame)
+
+            cleanup_counter += 1
+            if cleanup_counter >= 30:
+                self._cleanup_old_frames()
+                cleanup_counter = 0
+
+            time.sleep(FRAME_INTERVAL)
+
+    def _cleanup_old_frames(self):
+        """Remove old frame files, keeping only the most recent ones"""
+        try:
+            files = glob.glob(self.pattern)
+            if len(files) > MAX_FRAMES_TO_KEEP:
+                files.sort(key=os.path.getmtime)
+                for f in files[:-MAX_FRAMES_TO_KEEP]:
+                    self._remove(f)
+        except OSError:
+            pass
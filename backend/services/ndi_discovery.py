@@ -4,23 +4,53 @@ NDI Discovery Service - Discovers NDI sources on the network
 import subprocess
 import os
 import re
-from typing import List, Dict
+import json
+import time
+import signal
+import threading
+from typing import List, Dict, Optional
+from threading import Lock
 import logging
 
 logger = logging.getLogger(__name__)
 
 
 class NDIDiscoveryService:
-    """Discovers NDI sources using ndi_discover tool or yuri2"""
+    """
+    Discovers NDI sources using ndi_discover tool or yuri2.
+
+    A background worker keeps discovery running and maintains an in-memory
+    registry of sources, so API requests are served from the cache instead
+    of waiting on a full discovery run.
+    """
 
     def __init__(self, yuri_bin: str, extra_ips_file: str,
                  lib_path: str = '/usr/local/lib', ndi_lib_path: str = '/usr/local/lib/libndi.so.6',
-                 ndi_discover_bin: str = '/usr/local/bin/ndi_discover'):
+                 ndi_discover_bin: str = '/usr/local/bin/ndi_discover',
+                 timeout: int = 8, interval: float = 2.0, stale_after: float = 30.0,
+                 event_bus=None):
         self.yuri_bin = yuri_bin
         self.extra_ips_file = extra_ips_file
         self.lib_path = lib_path
         self.ndi_lib_path = ndi_lib_path
         self.ndi_discover_bin = ndi_discover_bin
+        self.timeout = timeout
+        self.interval = interval
+        self.stale_after = stale_after
+        self.event_bus = event_bus
+
+        # Source registry: name -> {name, address, first_seen, last_seen}
+        self.sources: Dict[str, Dict] = {}
+        self.lock = Lock()
+        self.last_scan: Optional[float] = None
+        self.scanning = False
+        # mtime of the ndi_discover binary found to lack --watch; None while --watch is assumed to work
+        self._watch_unsupported_mtime: Optional[float] = None
+        self._watch_events = 0
+
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
 
     def get_extra_ips(self) -> List[str]:
         """Read extra IPs from file"""
@@ -39,6 +69,7 @@ class NDIDiscoveryService:
         with open(self.extra_ips_file, 'w') as f:
             f.write('\n'.join(ips))
         logger.info(f"Updated extra IPs: {ips}")
+        self.request_refresh()
 
     def add_extra_ip(self, ip: str) -> List[str]:
         """Add an IP to the extra IPs list"""
@@ -56,6 +87,240 @@ class NDIDiscoveryService:
             self.set_extra_ips(ips)
         return ips
 
+    # Background discovery worker
+
+    def start(self):
+        """Start the background discovery worker"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name='ndi-discovery', daemon=True)
+        self._thread.start()
+        logger.info("Started NDI discovery worker")
+
+    def stop(self):
+        """Stop the background discovery worker"""
+        self._stopping.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=self.timeout + 5)
+            self._thread = None
+
+    def request_refresh(self):
+        """
+        Nudge the worker. In scan mode this starts a new discovery run right away;
+        in watch mode the finder is restarted only if the extra IPs have changed.
+        """
+        self._wake.set()
+
+    def list_sources(self) -> List[Dict]:
+        """Return the cached source registry, sorted by name"""
+        with self.lock:
+            return sorted((dict(s) for s in self.sources.values()), key=lambda s: s['name'])
+
+    def find_stream(self, stream_name: str) -> Optional[str]:
+        """Full NDI name ("MACHINE (stream)") of a discovered source with the given stream name, or None"""
+        suffix = f'({stream_name})'
+        with self.lock:
+            for name in sorted(self.sources):
+                if name.endswith(suffix):
+                    return name
+        return None
+
+    def get_state(self) -> Dict:
+        """Get discovery worker state"""
+        with self.lock:
+            return {
+                'running': self._thread is not None and self._thread.is_alive(),
+                'mode': 'watch' if self._use_watch() else 'scan',
+                'scanning': self.scanning,
+                'last_scan': self.last_scan,
+                'count': len(self.sources)
+            }
+
+    def _publish_sources(self):
+        """Push the current registry to event stream subscribers"""
+        if self.event_bus:
+            sources = self.list_sources()
+            self.event_bus.publish('sources', {'sources': sources, 'count': len(sources)})
+
+    def _binary_mtime(self) -> Optional[float]:
+        try:
+            return os.path.getmtime(self.ndi_discover_bin)
+        except OSError:
+            return None
+
+    def _use_watch(self) -> bool:
+        """Whether the persistent ndi_discover --watch finder can be used (retried once the binary changes)"""
+        mtime = self._binary_mtime()
+        if mtime is None:
+            return False
+        if self._watch_unsupported_mtime is not None and mtime != self._watch_unsupported_mtime:
+            logger.info("ndi_discover changed, trying --watch again")
+            self._watch_unsupported_mtime = None
+        return self._watch_unsupported_mtime is None
+
+    def _run(self):
+        """Worker loop: keep a watch finder alive, or fall back to periodic one-shot scans"""
+        while not self._stopping.is_set():
+            if self._use_watch():
+                self._run_watch()
+            else:
+                self._run_scan()
+
+    def _run_scan(self):
+        """Single one-shot discovery run, then sleep until the next run or a refresh request"""
+        self._wake.clear()
+        with self.lock:
+            self.scanning = True
+        try:
+            found = self.discover_sources(timeout=self.timeout)
+            self._update_registry(found)
+        except Exception as e:
+            logger.error(f"Discovery worker error: {e}")
+        finally:
+            with self.lock:
+                self.scanning = False
+
+        self._wake.wait(self.interval)
+
+    def _run_watch(self):
+        """Run ndi_discover --watch until it exits, the worker stops or the extra IPs change"""
+        extra_ips = self.get_extra_ips()
+        self._wake.clear()
+        try:
+            process = subprocess.Popen(
+                [self.ndi_discover_bin, '--watch'],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                bufsize=1,
+                env=self._get_env()
+            )
+        except Exception as e:
+            logger.error(f"Failed to start ndi_discover watcher: {e}")
+            self._wake.wait(self.interval)
+            return
+
+        logger.info(f"Started ndi_discover watcher (PID {process.pid})")
+        started_at = time.time()
+        with self.lock:
+            self.scanning = True
+            self._watch_events = 0
+        reader = threading.Thread(target=self._consume_watch_output, args=(process.stdout,),
+                                  name='ndi-discovery-reader', daemon=True)
+        reader.start()
+
+        swept = False
+        while not self._stopping.is_set() and process.poll() is None:
+            self._wake.wait(1.0)
+            if self._wake.is_set():
+                self._wake.clear()
+                if self.get_extra_ips() != extra_ips:
+                    logger.info("Extra IPs changed, restarting ndi_discover watcher")
+                    break
+
+            # A restarted finder re-announces everything it sees; drop what it did not
+            if not swept and time.time() - started_at > self.timeout:
+                self._expire_sources(before=started_at)
+                with self.lock:
+                    self.scanning = False
+                swept = True
+
+        if process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        reader.join(timeout=2)
+
+        with self.lock:
+            self.scanning = False
+            events = self._watch_events
+
+        if self._stopping.is_set():
+            return
+        if events == 0 and time.time() - started_at < self.timeout:
+            # Builds without --watch run a one-shot scan and exit
+            logger.warning("ndi_discover does not support --watch, falling back to periodic scans")
+            self._watch_unsupported_mtime = self._binary_mtime()
+            return
+        if process.returncode not in (None, 0, -signal.SIGTERM, -signal.SIGKILL):
+            logger.warning(f"ndi_discover watcher exited with code {process.returncode}")
+            self._wake.wait(self.interval)
+
+    def _consume_watch_output(self, stream):
+        """Apply NDJSON events from the watcher to the registry as they arrive"""
+        try:
+            for line in stream:
+                event = self._parse_watch_event(line)
+                if event:
+                    self._apply_watch_event(event)
+        except Exception as e:
+            logger.debug(f"ndi_discover watcher output closed: {e}")
+
+    def _apply_watch_event(self, event: Dict):
+        """Apply a single added/removed event"""
+        now = time.time()
+        changed = False
+        with self.lock:
+            self._watch_events += 1
+            self.last_scan = now
+            if event['event'] == 'added':
+                changed = self._upsert_source(event['name'], event.get('url'), now)
+            elif event['event'] == 'removed' and event['name'] in self.sources:
+                del self.sources[event['name']]
+                logger.info(f"NDI source disappeared: {event['name']}")
+                changed = True
+
+        if changed:
+            self._publish_sources()
+
+    def _upsert_source(self, name: str, address: Optional[str], now: float) -> bool:
+        """Add or refresh a registry entry (caller holds the lock). Returns True if it changed."""
+        entry = self.sources.get(name)
+        if entry is None:
+            self.sources[name] = {
+                'name': name,
+                'address': address,
+                'first_seen': now,
+                'last_seen': now
+            }
+            logger.info(f"NDI source appeared: {name}")
+            return True
+
+        changed = entry['address'] != address
+        entry['address'] = address
+        entry['last_seen'] = now
+        return changed
+
+    def _expire_sources(self, before: float) -> bool:
+        """Drop registry entries not seen since the given time. Returns True if any were dropped."""
+        with self.lock:
+            expired = [n for n, s in self.sources.items() if s['last_seen'] < before]
+            for name in expired:
+                del self.sources[name]
+                logger.info(f"NDI source disappeared: {name}")
+
+        if expired:
+            self._publish_sources()
+        return bool(expired)
+
+    def _update_registry(self, found: List[Dict]):
+        """Merge one-shot scan results into the registry and expire stale entries"""
+        now = time.time()
+        changed = False
+        with self.lock:
+            for source in found:
+                changed = self._upsert_source(source['name'], source.get('address'), now) or changed
+            self.last_scan = now
+
+        # Sources are not reported on every run, so only drop them after a grace period
+        if not self._expire_sources(before=now - self.stale_after) and changed:
+            self._publish_sources()
+
     def _get_env(self) -> dict:
         """Get environment with NDI paths set"""
         env = os.environ.copy()
@@ -143,3 +408,20 @@ class NDIDiscoveryService:
                 current_device = None
 
         return sources
+
+    def _parse_watch_event(self, line: str) -> Optional[Dict]:
+        """
+        Parse one line of ndi_discover --watch output, e.g.
+        {"event": "added", "name": "HOST (Camera)", "url": "192.168.1.10:5961"}
+        """
+        line = line.strip()
+        if not line.startswith('{'):
+            return None
+        try:
+            event = json.loads(line)
+        except ValueError:
+            logger.debug(f"Ignoring malformed watcher line: {line}")
+            return None
+        if event.get('event') not in ('added', 'removed') or not event.get('name'):
+            return None
+        return event
@@ -0,0 +1,255 @@
+"""
+Pipeline Manager - Any number of named capture-to-NDI pipelines with CPU admission control
+"""
+import os
+import re
+import time
+from threading import Lock
+from typing import Optional, Dict, List
+import logging
+
+from services.config_generator import PREVIEW_RENDITIONS
+from services.process_metrics import process_cpu_seconds
+
+logger = logging.getLogger(__name__)
+
+PIPELINE_TYPES = ('v4l2', 'libcamera')
+NAME_PATTERN = re.compile(r'^[a-z0-9][a-z0-9_-]{0,31}$')
+
+# Rough CPU cost estimates, in cores per megapixel/second of camera video, for a Pi 5 (unverified;
+# they only stand in until a pipeline's load is measured): MJPEG decode of USB capture devices,
+# and NDI (SpeedHQ) encode of every pipeline
+MJPEG_DECODE_COST = 0.015
+NDI_ENCODE_COST = 0.012
+# Scale + JPEG-encode of one preview rendition, per megapixel/second of the rendition
+PREVIEW_ENCODE_COST = 0.02
+PREVIEW_FPS = 10
+# Minimum seconds a process must have run before its sampled load replaces the estimate
+MEASURE_AFTER = 5.0
+
+
+def _megapixels(resolution: str) -> float:
+    width, height = (int(v) for v in resolution.lower().split('x'))
+    return width * height / 1e6
+
+
+def estimate_preview_cpu(renditions: List[str]) -> float:
+    """Estimated load in cores of the scale + JPEG-encode branches for renditions"""
+    return sum(_megapixels(PREVIEW_RENDITIONS[rendition]['resolution']) * PREVIEW_FPS * PREVIEW_ENCODE_COST
+               for rendition in renditions)
+
+
+def estimate_cpu(spec: Dict) -> float:
+    """Estimated load of a pipeline in cores, from the rough per-megapixel cost constants above"""
+    rate = _megapixels(spec['resolution']) * spec['fps']
+    cores = rate * NDI_ENCODE_COST
+    if spec['type'] == 'v4l2':
+        cores += rate * MJPEG_DECODE_COST
+    cores += estimate_preview_cpu(spec.get('preview_renditions', []))
+    return round(cores, 2)
+
+
+class InsufficientCPU(Exception):
+    """Raised when admitting a pipeline would exceed the CPU budget"""
+    def __init__(self, required: float, available: float, capacity: Dict):
+        super().__init__(f'Not enough CPU for this pipeline: needs ~{required} cores, {available} available')
+        self.required = required
+        self.available = available
+        self.capacity = capacity
+
+
+class PipelineManager:
+    """
+    Creates, lists and destroys independent capture-to-NDI pipelines.
+
+    Each pipeline is one yuri process named after the pipeline, with its
+    own generated config (pipeline_<name>.xml) and preview directory, so several
+    capture devices can each publish their own NDI stream; its preview is
+    served as the preview pipeline of the same name.
+
+    Before a pipeline starts, its CPU cost is estimated from resolution,
+    frame rate, source type and preview renditions, and compared with the
+    budget: cpu_budget of all cores minus reserved_cores, less the load of
+    every running yuri process. That load is the CPU use over the last
+    sampling interval of the ProcessSampler once the process has run for a
+    few seconds, and the estimate before that (or without a sample). A
+    pipeline that does not fit is refused unless forced.
+    """
+
+    def __init__(self, yuri_manager, config_generator, reserved_names: List[str],
+                 cpu_budget: float = 0.85, reserved_cores: float = 0.5, cpu_count: Optional[int] = None,
+                 process_sampler=None):
+        self.yuri_manager = yuri_manager
+        self.config_generator = config_generator
+        self.process_sampler = process_sampler
+        self.reserved_names = set(reserved_names)
+        self.cpu_budget = cpu_budget
+        self.reserved_cores = reserved_cores
+        self.cpu_count = cpu_count or os.cpu_count() or 1
+        self.pipelines: Dict[str, Dict] = {}
+        self.lock = Lock()
+
+    def validate(self, name: str, spec: Dict) -> Dict:
+        """Normalized pipeline spec; raises ValueError for bad input"""
+        if not isinstance(name, str) or not NAME_PATTERN.match(name):
+            raise ValueError('name must be 1-32 lowercase letters, digits, "-" or "_"')
+        if name in self.reserved_names:
+            raise ValueError(f"'{name}' is reserved")
+        pipeline_type = spec.get('type', 'v4l2')
+        if pipeline_type not in PIPELINE_TYPES:
+            raise ValueError(f"type must be one of: {', '.join(PIPELINE_TYPES)}")
+        resolution = spec.get('resolution', '1280x720')
+        try:
+            _megapixels(resolution)
+            fps = int(spec.get('fps', 30))
+        except (TypeError, ValueError):
+            raise ValueError('resolution must be WIDTHxHEIGHT and fps an integer')
+        renditions = spec.get('preview_renditions', [])
+        if not isinstance(renditions, list) or any(r not in PREVIEW_RENDITIONS for r in renditions):
+            raise ValueError(f"preview_renditions must be a list of: {', '.join(PREVIEW_RENDITIONS)}")
+        normalized = {
+            'type': pipeline_type,
+            'ndi_name': spec.get('ndi_name') or name,
+            'resolution': resolution,
+            'fps': fps,
+            'ptz': bool(spec.get('ptz', False)),
+            'preview_renditions': renditions
+        }
+        if pipeline_type == 'v4l2':
+            normalized['device'] = spec.get('device', '/dev/video0')
+        normalized['scheduling'] = self.yuri_manager.scheduling_for(spec.get('scheduling')).to_dict()
+        return normalized
+
+    def _sampled_cores(self, status: Dict) -> Optional[float]:
+        """Cores a process used over the last sampling interval, None before it has a rate"""
+        sample = self.process_sampler.latest(status['name']) if self.process_sampler else None
+        if sample is None or sample['pid'] != status.get('pid') or sample['cpu_percent'] is None:
+            return None
+        return sample['cpu_percent'] / 100
+
+    def _process_load(self, status: Dict, estimate: Optional[float]) -> float:
+        """Cores a running process uses: sampled once it has run a while, else the estimate"""
+        cores = self._sampled_cores(status)
+        if cores is not None and status['uptime'] >= MEASURE_AFTER:
+            return cores
+        return estimate or 0.0
+
+    def capacity(self, exclude: Optional[str] = None) -> Dict:
+        """
+        CPU budget and what the running yuri processes use of it. Pipelines
+        that are admitted but not running (yet) count with their estimate,
+        so concurrent creates cannot all pass admission. exclude leaves out
+        the pipeline being admitted.
+        """
+        budget = self.cpu_count * self.cpu_budget - self.reserved_cores
+        with self.lock:
+            estimates = {name: p['cpu_estimate'] for name, p in self.pipelines.items()}
+        used = {}
+        for name, status in self.yuri_manager.get_all_status().items():
+            if status.get('running') and name != exclude:
+                used[name] = round(self._process_load(status, estimates.get(name)), 2)
+        for name, estimate in estimates.items():
+            if name not in used and name != exclude:
+                used[name] = estimate
+        in_use = round(sum(used.values()), 2)
+        return {
+            'cpu_count': self.cpu_count,
+            'budget_cores': round(budget, 2),
+            'used_cores': in_use,
+            'available_cores': round(budget - in_use, 2),
+            'processes': used
+        }
+
+    def create(self, name: str, spec: Dict, force: bool = False) -> Dict:
+        """Admit and start a pipeline; raises ValueError, InsufficientCPU or RuntimeError"""
+        spec = self.validate(name, spec)
+        estimate = estimate_cpu(spec)
+        if spec['scheduling']['cpu_max'] is not None:
+            # A cgroup CPU limit caps what the pipeline can take from the others
+            estimate = min(estimate, spec['scheduling']['cpu_max'])
+        with self.lock:
+            if name in self.pipelines:
+                raise ValueError(f"Pipeline '{name}' already exists")
+            # Reserve the name and its estimate while the pipeline starts; capacity() counts both
+            self.pipelines[name] = {'name': name, 'spec': spec, 'cpu_estimate': estimate,
+                                    'created_at': time.time(), 'config': None}
+        try:
+            # Starting replaces any process of the same name, so its load is not counted
+            capacity = self.capacity(exclude=name)
+            if not force and estimate > capacity['available_cores']:
+                raise InsufficientCPU(estimate, capacity['available_cores'], capacity)
+            config_path = self._generate_config(name, spec)
+            self.pipelines[name]['config'] = config_path
+            result = self.yuri_manager.start_process(
+                name, config_path, preview_renditions=spec['preview_renditions'],
+                scheduling=self.yuri_manager.scheduling_for(spec['scheduling'])
+            )
+        except Exception:
+            with self.lock:
+                self.pipelines.pop(name, None)
+            raise
+        logger.info(f"Pipeline '{name}' created ({spec['type']} {spec['resolution']}@{spec['fps']}, "
+                    f"~{estimate} cores)")
+        return dict(self.get(name), start=result)
+
+    def _generate_config(self, name: str, spec: Dict) -> str:
+        generator = self.config_generator
+        common = {
+            'output_name': spec['ndi_name'],
+            'resolution': spec['resolution'],
+            'fps': spec['fps'],
+            'ptz_enabled': spec['ptz'],
+            'preview_renditions': spec['preview_renditions'],
+            'preview_name': name,
+            'config_name': f'pipeline_{name}'
+        }
+        if spec['type'] == 'libcamera':
+            return generator.generate_libcamera_output_config(**common)
+        return generator.generate_v4l2_output_config(device_path=spec['device'], **common)
+
+    def destroy(self, name: str) -> bool:
+        """Stop a pipeline and remove its generated config"""
+        with self.lock:
+            pipeline = self.pipelines.pop(name, None)
+        if pipeline is None:
+            return False
+        self.yuri_manager.stop_process(name)
+        if pipeline['config']:
+            try:
+                os.remove(pipeline['config'])
+            except OSError:
+                pass
+        logger.info(f"Pipeline '{name}' destroyed")
+        return True
+
+    def get(self, name: str) -> Optional[Dict]:
+        with self.lock:
+            pipeline = self.pipelines.get(name)
+            if pipeline is None:
+                return None
+            pipeline = dict(pipeline)
+        status = self.yuri_manager.get_status(name)
+        cpu_seconds = process_cpu_seconds(status['pid']) if status and status.get('pid') else None
+        measured = self._sampled_cores(status) if status else None
+        pipeline.update({
+            'status': status or {'name': name, 'running': False},
+            'preview_dir': self.config_generator.preview_dir(name),
+            'cpu': {
+                'estimate_cores': pipeline['cpu_estimate'],
+                'cpu_seconds': round(cpu_seconds, 2) if cpu_seconds is not None else None,
+                'measured_cores': round(measured, 2) if measured is not None else None
+            }
+        })
+        del pipeline['cpu_estimate']
+        return pipeline
+
+    def list(self) -> List[Dict]:
+        with self.lock:
+            names = sorted(self.pipelines)
+        return [p for p in (self.get(name) for name in names) if p is not None]
+
+    def destroy_all(self):
+        with self.lock:
+            names = list(self.pipelines)
+        for name in names:
+            self.destroy(name)
@@ -0,0 +1,113 @@
+"""
+Preview Hub - Frame broadcasters for every pipeline preview channel
+"""
+import os
+from typing import Dict, List, Tuple, Callable
+from threading import Lock
+import logging
+
+from services.frame_broadcaster import FrameBroadcaster
+
+logger = logging.getLogger(__name__)
+
+
+class PreviewHub:
+    """
+    Keeps one FrameBroadcaster per (pipeline, rendition).
+
+    Each pipeline writes its preview frames into <preview_root>/<pipeline>/.
+    Broadcasters are created on first use; listeners are told whenever the
+    number of clients watching a pipeline changes, which is what on-demand
+    preview producers key off.
+    """
+
+    def __init__(self, preview_root: str):
+        self.preview_root = preview_root
+        self.broadcasters: Dict[Tuple[str, str], FrameBroadcaster] = {}
+        self.active: Dict[str, List[str]] = {}
+        self.on_demand: Dict[str, List[str]] = {}  # pipelines started only while watched
+        self.listeners: List[Callable[[str, int], None]] = []
+        self.lock = Lock()
+
+    def preview_dir(self, pipeline: str) -> str:
+        return os.path.join(self.preview_root, pipeline)
+
+    def get(self, pipeline: str, rendition: str) -> FrameBroadcaster:
+        """Broadcaster for a preview channel, created on first use"""
+        with self.lock:
+            key = (pipeline, rendition)
+            broadcaster = self.broadcasters.get(key)
+            if broadcaster is None:
+                broadcaster = FrameBroadcaster(
+                    preview_dir=self.preview_dir(pipeline),
+                    pattern=f'{rendition}_*.jpg',
+                    on_subscribers_changed=lambda _count: self._notify(pipeline)
+                )
+                if rendition in self.active.get(pipeline, []):
+                    broadcaster.set_active(True)
+                self.broadcasters[key] = broadcaster
+            return broadcaster
+
+    def set_active(self, pipeline: str, renditions: List[str]):
+        """Record which renditions a pipeline is producing right now"""
+        with self.lock:
+            if renditions:
+                self.active[pipeline] = list(renditions)
+            else:
+                self.active.pop(pipeline, None)
+            existing = {r: b for (p, r), b in self.broadcasters.items() if p == pipeline}
+
+        for rendition, broadcaster in existing.items():
+            broadcaster.set_active(rendition in renditions)
+        # Make sure superseded frames are cleaned up even before anyone watches
+        for rendition in renditions:
+            if rendition not in existing:
+                self.get(pipeline, rendition)
+
+    def add_on_demand(self, pipeline: str, renditions: List[str]):
+        """Register a pipeline whose preview producer is started when a client connects"""
+        with self.lock:
+            self.on_demand[pipeline] = list(renditions)
+
+    def renditions(self, pipeline: str) -> List[str]:
+        """Renditions a client may request for a pipeline (produced now or on demand)"""
+        with self.lock:
+            return list(self.active.get(pipeline) or self.on_demand.get(pipeline, []))
+
+    def has_pipeline(self, pipeline: str) -> bool:
+        with self.lock:
+            return pipeline in self.active or pipeline in self.on_demand
+
+    def subscriber_count(self, pipeline: str) -> int:
+        with self.lock:
+            return sum(b.subscribers for (p, _), b in self.broadcasters.items() if p == pipeline)
+
+    def add_listener(self, listener: Callable[[str, int], None]):
+        """Register listener(pipeline, subscriber_count)"""
+        self.listeners.append(listener)
+
+    def _notify(self, pipeline: str):
+        count = self.subscriber_count(pipeline)
+        for listener in self.listeners:
+            try:
+                listener(pipeline, count)
+            except Exception as e:
+                logger.error(f"Preview listener failed for '{pipeline}': {e}")
+
+    def get_state(self) -> Dict[str, Dict]:
+        """Per-pipeline renditions and subscriber counts"""
+        with self.lock:
+            state: Dict[str, Dict] = {}
+            for pipeline in list(self.active) + list(self.on_demand):
+                state[pipeline] = {
+                    'renditions': list(self.active.get(pipeline) or self.on_demand.get(pipeline, [])),
+                    'active': pipeline in self.active,
+                    'on_demand': pipeline in self.on_demand,
+                    'subscribers': {}
+                }
+            for (pipeline, rendition), broadcaster in self.broadcasters.items():
+                entry = state.setdefault(pipeline, {
+                    'renditions': [], 'active': False, 'on_demand': False, 'subscribers': {}
+                })
+                entry['subscribers'][rendition] = broadcaster.subscribers
+            return state
@@ -0,0 +1,250 @@
+"""
+NDI Preview Monitor - On-demand browser preview of an NDI source
+"""
+import time
+import threading
+from typing import Callable, Optional, Dict, List, Tuple
+import logging
+
+from services.pipeline_manager import estimate_preview_cpu
+from services.process_metrics import process_cpu_seconds
+
+logger = logging.getLogger(__name__)
+
+VIEWER_PREVIEW_NAME = 'viewer_preview'
+OUTPUT_PREVIEW_NAME = 'output_preview'
+
+
+class NDIPreviewMonitor:
+    """
+    Runs a preview-only yuri graph (NDI receiver + preview branches) for an
+    NDI source, but only while a browser is watching it.
+
+    Used for the source the viewer is showing (the viewer graph renders to
+    the display) and for our own output stream, so the output graph does not
+    have to scale and JPEG-encode every camera frame while nobody watches.
+    yuri graphs cannot be changed while they run, so pausing a branch means
+    not running it: the preview process is started when the first client
+    connects and stopped once the last one has been gone for `linger`
+    seconds, so quick reconnects (page reloads, rendition switches) do not
+    restart the receiver.
+
+    With resolve_source, the source is a name that is only turned into the
+    NDI source to receive when the preview starts (our own output is set by
+    stream name and looked up in discovery then).
+
+    CPU time of the preview process is measured while it runs. It includes
+    a second NDI receive + decode of the source, which preview branches
+    inside the source's own graph never pay, so while someone watches this
+    costs more than inline branches would. What pausing saves is only the
+    preview branches (scale + JPEG encode): their estimated load times the
+    time a source was available but nobody watched. extra_cpu_seconds is
+    the measured cost beyond those branches while the preview ran.
+    """
+
+    def __init__(self, yuri_manager, config_generator, preview_hub,
+                 renditions: List[str], name: str = VIEWER_PREVIEW_NAME, linger: float = 10.0,
+                 event_bus=None, resolve_source: Optional[Callable[[str], Optional[str]]] = None):
+        self.yuri_manager = yuri_manager
+        self.resolve_source = resolve_source
+        self.config_generator = config_generator
+        self.preview_hub = preview_hub
+        self.renditions = list(renditions)
+        self.name = name
+        self.linger = linger
+        self.event_bus = event_bus
+        self.source: Optional[str] = None
+        self.running_key: Optional[Tuple] = None
+        self.failed_key: Optional[Tuple] = None
+        self.subscribers = 0
+        self.idle_deadline = 0.0
+        self.condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+        # CPU accounting
+        self.pid: Optional[int] = None
+        self.run_started: Optional[float] = None
+        self.cpu_at_start = 0.0
+        self.run_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.idle_seconds = 0.0
+        self.idle_since: Optional[float] = None
+
+        preview_hub.add_on_demand(name, self.renditions)
+        preview_hub.add_listener(self._on_subscribers_changed)
+
+    def set_source(self, source: Optional[str], renditions: Optional[List[str]] = None):
+        """Called when the monitored stream starts, switches or stops (None)"""
+        with self.condition:
+            self.source = source
+            if renditions is not None and renditions != self.renditions:
+                self.renditions = list(renditions)
+                self.preview_hub.add_on_demand(self.name, self.renditions)
+            self.failed_key = None
+            self._update_idle()
+            self._wake()
+        self._publish()
+
+    def _on_subscribers_changed(self, pipeline: str, count: int):
+        if pipeline != self.name:
+            return
+        with self.condition:
+            if count == 0 and self.subscribers > 0:
+                self.idle_deadline = time.monotonic() + self.linger
+            elif count > self.subscribers:
+                # A new client retries a failed start and replaces a preview that died
+                self.failed_key = None
+                if self.running_key is not None and self.yuri_manager.get_status(self.name) is None:
+                    self._account_stopped(None)
+                    self.running_key = None
+            self.subscribers = count
+            self._wake()
+
+    def _wake(self):
+        """Start the worker or nudge it (caller holds the condition)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name=f'{self.name}-monitor', daemon=True)
+            self._thread.start()
+        self.condition.notify_all()
+
+    def _wanted_key(self) -> Optional[Tuple]:
+        """(source, renditions) the preview should be running for right now (caller holds the condition)"""
+        if self.source is None:
+            return None
+        key = (self.source, tuple(self.renditions))
+        if key == self.failed_key:
+            return None
+        if self.subscribers > 0 or time.monotonic() < self.idle_deadline:
+            return key
+        return None
+
+    def _run(self):
+        """Start, restart or stop the preview process whenever the wanted source changes"""
+        while True:
+            with self.condition:
+                wanted = self._wanted_key()
+                while wanted == self.running_key:
+                    if self.running_key is None and self.source is None:
+                        # Nothing to do until the monitored stream starts again
+                        self._thread = None
+                        return
+                    timeout = None
+                    if self.running_key is not None and self.subscribers == 0:
+                        timeout = max(0.0, self.idle_deadline - time.monotonic())
+                    self.condition.wait(timeout)
+                    wanted = self._wanted_key()
+
+            if wanted is None:
+                self._stop()
+            else:
+                self._start(wanted)
+            self._publish()
+
+    def _start(self, key: Tuple):
+        source, renditions = key
+        with self.condition:
+            # start_process replaces a running preview; measure it before it goes
+            previous_cpu = process_cpu_seconds(self.pid) if self.pid else None
+        try:
+            ndi_source = self.resolve_source(source) if self.resolve_source else source
+            if ndi_source is None:
+                raise RuntimeError(f"'{source}' has not been discovered yet")
+            config_path = self.config_generator.generate_ndi_preview_config(
+                ndi_source=ndi_source,
+                preview_renditions=list(renditions),
+                preview_name=self.name
+            )
+            self.yuri_manager.start_process(self.name, config_path, preview_renditions=list(renditions))
+            logger.info(f"Preview '{self.name}' started for '{source}'")
+        except Exception as e:
+            logger.error(f"Failed to start preview '{self.name}': {e}")
+
+        status = self.yuri_manager.get_status(self.name)
+        with self.condition:
+            if self.running_key is not None:
+                self._account_stopped(previous_cpu)
+            if status and status.get('pid'):
+                self.running_key = key
+                self.pid = status['pid']
+                self.run_started = time.monotonic()
+                self.cpu_at_start = process_cpu_seconds(self.pid) or 0.0
+            else:
+                self.running_key = None
+                # Do not retry in a tight loop; wait for the next client or source change
+                self.failed_key = key
+            self._update_idle()
+
+    def _stop(self):
+        with self.condition:
+            cpu = process_cpu_seconds(self.pid) if self.pid else None
+        try:
+            self.yuri_manager.stop_process(self.name)
+            logger.info(f"Preview '{self.name}' stopped")
+        except Exception as e:
+            logger.error(f"Failed to stop preview '{self.name}': {e}")
+        with self.condition:
+            self._account_stopped(cpu)
+            self.running_key = None
+            self._update_idle()
+
+    def _account_stopped(self, cpu: Optional[float]):
+        """Add the finished run to the CPU totals (caller holds the condition)"""
+        if self.run_started is not None:
+            self.run_seconds += time.monotonic() - self.run_started
+            if cpu is not None:
+                self.cpu_seconds += max(0.0, cpu - self.cpu_at_start)
+        self.pid = None
+        self.run_started = None
+
+    def _update_idle(self):
+        """Track time a source is available but no preview process runs (caller holds the condition)"""
+        now = time.monotonic()
+        idle = self.source is not None and self.running_key is None
+        if self.idle_since is not None and not idle:
+            self.idle_seconds += now - self.idle_since
+            self.idle_since = None
+        elif self.idle_since is None and idle:
+            self.idle_since = now
+
+    def _publish(self):
+        if self.event_bus:
+            self.event_bus.publish('preview_monitor', self.get_state())
+
+    def get_cpu_stats(self) -> Dict:
+        """Measured preview cost and the CPU time saved by running it on demand"""
+        with self.condition:
+            now = time.monotonic()
+            run_seconds = self.run_seconds
+            cpu_seconds = self.cpu_seconds
+            if self.run_started is not None and self.pid:
+                cpu = process_cpu_seconds(self.pid)
+                run_seconds += now - self.run_started
+                if cpu is not None:
+                    cpu_seconds += max(0.0, cpu - self.cpu_at_start)
+            idle_seconds = self.idle_seconds
+            if self.idle_since is not None:
+                idle_seconds += now - self.idle_since
+
+        # Average share of one core the preview used while running
+        cpu_load = cpu_seconds / run_seconds if run_seconds > 0 else None
+        # Only the preview branches would have run inline; the receive/decode is extra
+        branch_load = estimate_preview_cpu(self.renditions)
+        return {
+            'preview_seconds': round(run_seconds, 1),
+            'preview_cpu_seconds': round(cpu_seconds, 2),
+            'preview_cpu_percent': round(cpu_load * 100, 1) if cpu_load is not None else None,
+            'paused_seconds': round(idle_seconds, 1),
+            'branch_cpu_estimate': round(branch_load, 2),
+            'cpu_seconds_saved': round(branch_load * idle_seconds, 2),
+            'extra_cpu_seconds': round(max(0.0, cpu_seconds - branch_load * run_seconds), 2)
+        }
+
+    def get_state(self) -> Dict:
+        with self.condition:
+            return {
+                'name': self.name,
+                'source': self.source,
+                'running': self.running_key is not None,
+                'subscribers': self.subscribers,
+                'renditions': list(self.renditions)
+            }
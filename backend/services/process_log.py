@@ -0,0 +1,106 @@
+"""
+Process Log - Drains yuri stdout/stderr into a bounded in-memory ring buffer
+"""
+import os
+import time
+import threading
+import logging
+from logging.handlers import RotatingFileHandler
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+STREAMS = ('stdout', 'stderr', 'system')
+
+
+class ProcessLog:
+    """
+    Output of one named process, kept across restarts.
+
+    While a process runs, one pump thread per pipe reads it line by line, so
+    yuri never blocks writing to a full pipe (64 KB) however verbose it is.
+    The newest max_lines lines are kept in memory with a sequence number,
+    which clients use to ask for lines after the last one they saw and to
+    follow the log. With log_dir set, lines are also written to
+    <log_dir>/<name>.log, rotated at max_bytes with `backups` old files.
+    """
+
+    def __init__(self, name: str, max_lines: int = 2000, log_dir: Optional[str] = None,
+                 max_bytes: int = 1024 * 1024, backups: int = 3):
+        self.name = name
+        self.lines: Deque[Dict] = deque(maxlen=max_lines)
+        self.seq = 0
+        self.condition = threading.Condition()
+        self.pumps: List[threading.Thread] = []
+        self.file_logger: Optional[logging.Logger] = None
+        if log_dir:
+            try:
+                os.makedirs(log_dir, exist_ok=True)
+                handler = RotatingFileHandler(os.path.join(log_dir, f'{name}.log'),
+                                              maxBytes=max_bytes, backupCount=backups)
+                handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+                self.file_logger = logging.getLogger(f'yuri.{name}')
+                self.file_logger.handlers = [handler]
+                self.file_logger.setLevel(logging.INFO)
+                self.file_logger.propagate = False
+            except OSError as e:
+                logger.warning(f"Cannot write log file for '{name}': {e}")
+
+    def attach(self, process) -> int:
+        """Start draining a new process's pipes; returns the sequence number its lines start after"""
+        start_seq = self.append('system', f'started (PID {process.pid})')
+        self.pumps = []
+        for stream in ('stdout', 'stderr'):
+            pipe = getattr(process, stream)
+            if pipe is None:
+                continue
+            pump = threading.Thread(target=self._pump, args=(pipe, stream),
+                                    name=f'yuri-log-{self.name}-{stream}', daemon=True)
+            pump.start()
+            self.pumps.append(pump)
+        return start_seq
+
+    def drain(self, timeout: float = 1.0):
+        """Wait for the pumps to read everything an exited process wrote"""
+        deadline = time.monotonic() + timeout
+        for pump in self.pumps:
+            pump.join(max(0.0, deadline - time.monotonic()))
+
+    def _pump(self, pipe, stream: str):
+        try:
+            for raw in iter(pipe.readline, b''):
+                self.append(stream, raw.decode(errors='replace').rstrip('\r\n'))
+        except (OSError, ValueError):
+            pass
+        finally:
+            try:
+                pipe.close()
+            except OSError:
+                pass
+
+    def append(self, stream: str, text: str) -> int:
+        with self.condition:
+            self.seq += 1
+            self.lines.append({'seq': self.seq, 'time': time.time(), 'stream': stream, 'text': text})
+            self.condition.notify_all()
+            seq = self.seq
+        if self.file_logger:
+            self.file_logger.info(f'[{stream}] {text}')
+        return seq
+
+    def tail(self, count: Optional[int] = None, after: int = 0, stream: Optional[str] = None) -> List[Dict]:
+        """Lines newer than `after` (optionally one stream only), the last `count` of them"""
+        with self.condition:
+            lines = [line for line in self.lines
+                     if line['seq'] > after and (stream is None or line['stream'] == stream)]
+        return lines[-count:] if count else lines
+
+    def text_since(self, after: int, stream: str = 'stderr') -> str:
+        return '\n'.join(line['text'] for line in self.tail(after=after, stream=stream))
+
+    def wait(self, after: int, timeout: Optional[float] = None) -> int:
+        """Block until a line newer than `after` exists or the timeout expires; returns the last seq"""
+        with self.condition:
+            self.condition.wait_for(lambda: self.seq > after, timeout)
+            return self.seq
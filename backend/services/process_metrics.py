@@ -0,0 +1,292 @@
+"""
+Process Metrics - Samples /proc for every managed yuri process into a bounded time series
+"""
+import os
+import time
+import shutil
+import threading
+import subprocess
+from collections import deque
+from typing import Deque, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+_CLK_TCK = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+THERMAL_ZONE = '/sys/class/thermal/thermal_zone0/temp'
+# Raspberry Pi firmware exposes the get_throttled bits here on current kernels; vcgencmd otherwise
+THROTTLED_SYSFS = '/sys/devices/platform/soc/soc:firmware/get_throttled'
+THROTTLE_FLAGS = {
+    0: 'under_voltage',
+    1: 'arm_frequency_capped',
+    2: 'throttled',
+    3: 'soft_temperature_limit',
+    16: 'under_voltage_occurred',
+    17: 'arm_frequency_capped_occurred',
+    18: 'throttled_occurred',
+    19: 'soft_temperature_limit_occurred'
+}
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path, 'r') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _stat_fields(text: str) -> List[str]:
+    """Fields of a /proc stat line after the command name (which may contain spaces), from field 3 on"""
+    return text[text.rfind(')') + 2:].split()
+
+
+def _status_values(text: str) -> Dict[str, str]:
+    values = {}
+    for line in text.splitlines():
+        key, _, value = line.partition(':')
+        values[key] = value.strip()
+    return values
+
+
+def read_stat(pid: int) -> Optional[Dict]:
+    """CPU ticks, thread count and RSS of a process from /proc/<pid>/stat alone; None if it is gone"""
+    stat = _read(f'/proc/{pid}/stat')
+    if stat is None:
+        return None
+    fields = _stat_fields(stat)
+    try:
+        return {
+            'cpu_ticks': int(fields[11]) + int(fields[12]),
+            'threads': int(fields[17]),
+            'rss_bytes': int(fields[21]) * _PAGE_SIZE
+        }
+    except (IndexError, ValueError):
+        return None
+
+
+def process_cpu_seconds(pid: int) -> Optional[float]:
+    """User + system CPU time consumed by a process"""
+    stat = read_stat(pid)
+    return stat['cpu_ticks'] / _CLK_TCK if stat else None
+
+
+def thread_count(pid: int) -> int:
+    """Threads of a process (0 if unknown)"""
+    stat = read_stat(pid)
+    return stat['threads'] if stat else 0
+
+
+def read_process(pid: int) -> Optional[Dict]:
+    """Raw counters of a process from /proc/<pid>/stat, status, io and task/*/stat; None if it is gone"""
+    sample = read_stat(pid)
+    status = _read(f'/proc/{pid}/status')
+    if sample is None or status is None:
+        return None
+    values = _status_values(status)
+    try:
+        sample.update({
+            'rss_peak_bytes': int(values.get('VmHWM', '0 kB').split()[0]) * 1024,
+            'voluntary_ctxt_switches': int(values.get('voluntary_ctxt_switches', 0)),
+            'nonvoluntary_ctxt_switches': int(values.get('nonvoluntary_ctxt_switches', 0))
+        })
+    except (IndexError, ValueError):
+        return None
+
+    # Only readable by the owner; yuri runs as the backend's user
+    io = _read(f'/proc/{pid}/io')
+    if io is not None:
+        io_values = _status_values(io)
+        sample['io'] = {key: int(io_values[key]) for key in ('rchar', 'wchar', 'read_bytes', 'write_bytes')
+                        if key in io_values}
+
+    threads = {}
+    try:
+        tids = os.listdir(f'/proc/{pid}/task')
+    except OSError:
+        tids = []
+    for tid in tids:
+        text = _read(f'/proc/{pid}/task/{tid}/stat')
+        if text is None:
+            continue
+        task = _stat_fields(text)
+        try:
+            threads[int(tid)] = {'name': text[text.find('(') + 1:text.rfind(')')],
+                                 'cpu_ticks': int(task[11]) + int(task[12]),
+                                 'processor': int(task[36])}
+        except (IndexError, ValueError):
+            continue
+    sample['thread_ticks'] = threads
+    return sample
+
+
+def read_soc(vcgencmd: Optional[str] = None) -> Dict:
+    """SoC temperature and firmware throttling flags (None where this board does not report them)"""
+    temperature = _read(THERMAL_ZONE)
+    throttled = _read(THROTTLED_SYSFS)
+    if throttled is None and vcgencmd:
+        try:
+            output = subprocess.run([vcgencmd, 'get_throttled'], capture_output=True,
+                                    text=True, timeout=2).stdout
+            throttled = output.strip().partition('=')[2] or None
+        except (OSError, subprocess.SubprocessError):
+            throttled = None
+    soc = {'temperature_c': None, 'throttled': None, 'throttle_flags': None}
+    try:
+        if temperature is not None:
+            soc['temperature_c'] = round(int(temperature) / 1000, 1)
+        if throttled is not None:
+            bits = int(throttled.strip(), 16)
+            soc['throttled'] = hex(bits)
+            soc['throttle_flags'] = [flag for bit, flag in THROTTLE_FLAGS.items() if bits & (1 << bit)]
+    except ValueError:
+        pass
+    return soc
+
+
+class ProcessSampler:
+    """
+    Background sampler of yuri process resource usage.
+
+    Every interval seconds it reads /proc for each running managed process
+    and appends one sample per process to a series of the last `history`
+    samples, kept across restarts (each sample carries its PID). Rates
+    (CPU %, per-thread CPU %, context switches and I/O per second) are the
+    deltas to the previous sample of the same PID; CPU % is of one core, so
+    a process busy on all four cores of a Pi reads 400. The SoC temperature
+    and throttling flags are sampled on the same tick.
+    """
+
+    def __init__(self, yuri_manager, interval: float = 2.0, history: int = 300,
+                 vcgencmd_bin: str = 'vcgencmd'):
+        self.yuri_manager = yuri_manager
+        self.interval = interval
+        self.history = history
+        self.vcgencmd = shutil.which(vcgencmd_bin) if vcgencmd_bin else None
+        self.series: Dict[str, Deque[Dict]] = {}
+        self.soc: Deque[Dict] = deque(maxlen=history)
+        self._previous: Dict[str, tuple] = {}  # name -> (pid, monotonic time, raw counters)
+        self.lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start the background sampler"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name='process-sampler', daemon=True)
+        self._thread.start()
+        logger.info(f"Started process sampler ({self.interval}s interval, {self.history} samples)")
+
+    def stop(self):
+        """Stop the background sampler"""
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                self.sample()
+            except Exception as e:
+                logger.error(f"Process sampling failed: {e}")
+            self._stopping.wait(self.interval)
+
+    def sample(self):
+        """Take one sample of every running process and of the SoC"""
+        now, now_monotonic = time.time(), time.monotonic()
+        soc = dict(read_soc(self.vcgencmd), time=now)
+        samples = {}
+        for name, status in self.yuri_manager.get_all_status().items():
+            pid = status.get('pid')
+            raw = read_process(pid) if pid else None
+            if raw is not None:
+                samples[name] = self._rates(name, pid, now_monotonic, raw, now)
+        for name in set(self._previous) - set(samples):
+            del self._previous[name]
+
+        with self.lock:
+            self.soc.append(soc)
+            for name, sample in samples.items():
+                series = self.series.get(name)
+                if series is None:
+                    series = self.series[name] = deque(maxlen=self.history)
+                series.append(sample)
+
+    def _rates(self, name: str, pid: int, now: float, raw: Dict, wall_time: float) -> Dict:
+        """Public sample from raw counters and the previous counters of the same PID"""
+        previous = self._previous.get(name)
+        self._previous[name] = (pid, now, raw)
+        elapsed = now - previous[1] if previous and previous[0] == pid else None
+        before = previous[2] if elapsed else None
+
+        def per_second(value, old):
+            return round((value - old) / elapsed, 1) if before is not None else None
+
+        threads = []
+        for tid, thread in raw['thread_ticks'].items():
+            old = before['thread_ticks'].get(tid) if before is not None else None
+            threads.append({
+                'tid': tid,
+                'name': thread['name'],
+                'processor': thread['processor'],
+                'cpu_percent': per_second(thread['cpu_ticks'] / _CLK_TCK * 100,
+                                          old['cpu_ticks'] / _CLK_TCK * 100) if old else None
+            })
+        threads.sort(key=lambda t: t['cpu_percent'] or 0, reverse=True)
+
+        sample = {
+            'time': wall_time,
+            'pid': pid,
+            'cpu_percent': per_second(raw['cpu_ticks'] / _CLK_TCK * 100,
+                                      before['cpu_ticks'] / _CLK_TCK * 100 if before else 0),
+            'cpu_seconds': round(raw['cpu_ticks'] / _CLK_TCK, 2),
+            'rss_bytes': raw['rss_bytes'],
+            'rss_peak_bytes': raw['rss_peak_bytes'],
+            'thread_count': raw['threads'],
+            'voluntary_ctxt_switches': raw['voluntary_ctxt_switches'],
+            'nonvoluntary_ctxt_switches': raw['nonvoluntary_ctxt_switches'],
+            'voluntary_ctxt_switches_per_second': per_second(
+                raw['voluntary_ctxt_switches'], before['voluntary_ctxt_switches'] if before else 0),
+            'nonvoluntary_ctxt_switches_per_second': per_second(
+                raw['nonvoluntary_ctxt_switches'], before['nonvoluntary_ctxt_switches'] if before else 0),
+            'threads': threads
+        }
+        if 'io' in raw:
+            sample['io'] = dict(raw['io'])
+            if before is not None and 'io' in before:
+                sample['io'].update({f'{key}_per_second': per_second(value, before['io'].get(key, value))
+                                     for key, value in raw['io'].items()})
+        return sample
+
+    def get_metrics(self, name: str, count: Optional[int] = None) -> Optional[Dict]:
+        """The last `count` samples of a process (all kept if None) with the SoC readings of the same period"""
+        with self.lock:
+            series = self.series.get(name)
+            if series is None:
+                return None
+            samples = list(series)[-count:] if count else list(series)
+            since = samples[0]['time'] if samples else time.time()
+            soc = [reading for reading in self.soc if reading['time'] >= since]
+        return {
+            'name': name,
+            'interval': self.interval,
+            'latest': samples[-1] if samples else None,
+            'samples': samples,
+            'soc': soc[-1] if soc else read_soc(self.vcgencmd),
+            'soc_samples': soc
+        }
+
+    def latest(self, name: str) -> Optional[Dict]:
+        """Most recent sample of a process, None if it has none"""
+        with self.lock:
+            series = self.series.get(name)
+            return series[-1] if series else None
+
+    def get_soc(self) -> Dict:
+        with self.lock:
+            return self.soc[-1] if self.soc else read_soc(self.vcgencmd)
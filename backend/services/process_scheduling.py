@@ -0,0 +1,259 @@
+"""
+Process Scheduling - CPU affinity, priority and cgroup limits for yuri processes
+"""
+import os
+from typing import Dict, List, Optional, Set
+import logging
+
+logger = logging.getLogger(__name__)
+
+CGROUP_MOUNT = '/sys/fs/cgroup'
+CGROUP_PERIOD_US = 100000
+SIZE_UNITS = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+
+def parse_cpu_list(text: Optional[str]) -> Optional[Set[int]]:
+    """'0-1,3' -> {0, 1, 3}; empty -> None (no restriction)"""
+    if text is None or not str(text).strip():
+        return None
+    cpus = set()
+    for part in str(text).split(','):
+        part = part.strip()
+        if '-' in part:
+            first, last = (int(v) for v in part.split('-', 1))
+            cpus.update(range(first, last + 1))
+        elif part:
+            cpus.add(int(part))
+    return cpus
+
+
+def format_cpu_list(cpus: Optional[Set[int]]) -> Optional[str]:
+    """{0, 1, 3} -> '0-1,3'"""
+    if not cpus:
+        return None
+    ranges, ordered = [], sorted(cpus)
+    first = last = ordered[0]
+    for cpu in ordered[1:] + [None]:
+        if cpu is not None and cpu == last + 1:
+            last = cpu
+            continue
+        ranges.append(str(first) if first == last else f'{first}-{last}')
+        if cpu is not None:
+            first = last = cpu
+    return ','.join(ranges)
+
+
+def parse_size(text) -> Optional[int]:
+    """'512M' -> bytes; empty -> None (no limit)"""
+    if text is None or not str(text).strip():
+        return None
+    text = str(text).strip().upper().rstrip('B')
+    if text[-1] in SIZE_UNITS:
+        return int(float(text[:-1]) * SIZE_UNITS[text[-1]])
+    return int(text)
+
+
+def available_cpus() -> Set[int]:
+    """Online CPUs of the machine (not just those the backend may run on)"""
+    try:
+        with open('/sys/devices/system/cpu/online', 'r') as f:
+            return parse_cpu_list(f.read()) or set()
+    except (OSError, ValueError):
+        return set(range(os.cpu_count() or 1))
+
+
+class SchedulingPolicy:
+    """
+    Where and how one yuri process runs: CPU affinity, nice level or
+    SCHED_FIFO priority (realtime_priority > 0), and cgroup v2 limits
+    (cpu_max in cores, memory_max in bytes).
+    """
+
+    FIELDS = ('cpus', 'nice', 'realtime_priority', 'cpu_max', 'memory_max')
+
+    def __init__(self, cpus: Optional[Set[int]] = None, nice: int = 0, realtime_priority: int = 0,
+                 cpu_max: Optional[float] = None, memory_max: Optional[int] = None):
+        self.cpus = set(cpus) if cpus else None
+        self.nice = nice
+        self.realtime_priority = realtime_priority
+        self.cpu_max = cpu_max
+        self.memory_max = memory_max
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict], defaults: Optional['SchedulingPolicy'] = None) -> 'SchedulingPolicy':
+        """Policy from API/config values, falling back to defaults; raises ValueError for bad input"""
+        base = defaults.to_dict() if defaults else {}
+        data = dict(base, **(data or {}))
+        unknown = set(data) - set(cls.FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown scheduling settings: {', '.join(sorted(unknown))}")
+        try:
+            cpus = data.get('cpus')
+            cpus = set(cpus) if isinstance(cpus, list) else parse_cpu_list(cpus)
+            nice = int(data.get('nice') or 0)
+            realtime_priority = int(data.get('realtime_priority') or 0)
+            cpu_max = float(data['cpu_max']) if data.get('cpu_max') not in (None, '') else None
+            memory_max = parse_size(data.get('memory_max'))
+        except (TypeError, ValueError):
+            raise ValueError('cpus must be a CPU list like "1-3", nice, realtime_priority integers, '
+                             'cpu_max a number of cores and memory_max a size like "512M"')
+        if cpus is not None and not cpus <= available_cpus():
+            raise ValueError(f'cpus must be within {format_cpu_list(available_cpus())}')
+        if not -20 <= nice <= 19:
+            raise ValueError('nice must be between -20 and 19')
+        if not 0 <= realtime_priority <= 99:
+            raise ValueError('realtime_priority must be between 0 (off) and 99')
+        if cpu_max is not None and cpu_max <= 0:
+            raise ValueError('cpu_max must be positive')
+        return cls(cpus, nice, realtime_priority, cpu_max, memory_max)
+
+    def to_dict(self) -> Dict:
+        return {
+            'cpus': format_cpu_list(self.cpus),
+            'nice': self.nice,
+            'realtime_priority': self.realtime_priority,
+            'cpu_max': self.cpu_max,
+            'memory_max': self.memory_max
+        }
+
+    @property
+    def limited(self) -> bool:
+        return self.cpu_max is not None or self.memory_max is not None
+
+    def apply(self, pid: int):
+        """
+        Apply affinity and priority to a started process and to every thread
+        it has so far; threads it creates later inherit them. This runs in the
+        backend after the spawn, because a preexec_fn is not safe in a
+        threaded parent. Without cpus the process gets all online CPUs, so it
+        never inherits the backend's own confinement. Failures are ignored
+        here and show up in verify().
+        """
+        cpus = self.cpus or available_cpus()
+        done: Set[int] = set()
+        while True:
+            # Repeat until no thread appeared that was created before its parent was moved
+            try:
+                tids = {int(tid) for tid in os.listdir(f'/proc/{pid}/task')} - done
+            except OSError:
+                return
+            if not tids:
+                return
+            for tid in tids:
+                self._apply_thread(tid, cpus)
+            done |= tids
+
+    def _apply_thread(self, tid: int, cpus: Set[int]):
+        try:
+            os.sched_setaffinity(tid, cpus)
+        except OSError:
+            pass
+        try:
+            if self.realtime_priority:
+                os.sched_setscheduler(tid, os.SCHED_FIFO, os.sched_param(self.realtime_priority))
+            elif self.nice:
+                # On Linux PRIO_PROCESS with a thread ID sets the nice level of that thread
+                os.setpriority(os.PRIO_PROCESS, tid, self.nice)
+        except OSError:
+            pass
+
+    def verify(self, pid: int) -> List[str]:
+        """What the kernel refused to apply to a started process"""
+        problems = []
+        try:
+            if self.cpus is not None and set(os.sched_getaffinity(pid)) != self.cpus:
+                problems.append(f'affinity {format_cpu_list(self.cpus)} not applied')
+            if self.realtime_priority and os.sched_getscheduler(pid) != os.SCHED_FIFO:
+                problems.append('SCHED_FIFO not permitted (needs CAP_SYS_NICE)')
+            elif not self.realtime_priority and self.nice and os.getpriority(os.PRIO_PROCESS, pid) != self.nice:
+                problems.append(f'nice {self.nice} not permitted (needs CAP_SYS_NICE)')
+        except OSError:
+            # Exited already; reported as a failed start instead
+            pass
+        return problems
+
+
+class CgroupManager:
+    """
+    One cgroup v2 group per limited yuri process, <root>/yuri-<name>.
+
+    root defaults to the service's own cgroup, which must be delegated
+    (systemd Delegate=yes). Because a cgroup with controllers enabled for its
+    children may not hold processes itself, the backend first moves itself
+    into the leaf <root>/backend.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or self._own_cgroup()
+        self.prepared = False
+
+    @staticmethod
+    def _own_cgroup() -> Optional[str]:
+        try:
+            with open('/proc/self/cgroup', 'r') as f:
+                for line in f:
+                    if line.startswith('0::'):
+                        return os.path.join(CGROUP_MOUNT, line.strip()[3:].lstrip('/'))
+        except OSError:
+            pass
+        return None
+
+    @staticmethod
+    def _write(path: str, value: str):
+        with open(path, 'w') as f:
+            f.write(value)
+
+    def _prepare(self):
+        if self.prepared:
+            return
+        if not self.root or not os.path.isdir(self.root):
+            raise OSError(f'cgroup {self.root} not available')
+        procs = os.path.join(self.root, 'cgroup.procs')
+        with open(procs, 'r') as f:
+            pids = [line.strip() for line in f if line.strip()]
+        if pids:
+            leaf = os.path.join(self.root, 'backend')
+            os.makedirs(leaf, exist_ok=True)
+            for pid in pids:
+                try:
+                    self._write(os.path.join(leaf, 'cgroup.procs'), pid)
+                except OSError:
+                    # Exited meanwhile
+                    pass
+        self._write(os.path.join(self.root, 'cgroup.subtree_control'), '+cpu +memory')
+        self.prepared = True
+
+    def group_path(self, name: str) -> str:
+        return os.path.join(self.root or '', f'yuri-{name}')
+
+    def attach(self, name: str, pid: int, policy: SchedulingPolicy) -> str:
+        """Put a started process into its limited cgroup; raises OSError if cgroups are unusable"""
+        self._prepare()
+        path = self.group_path(name)
+        os.makedirs(path, exist_ok=True)
+        quota = int(policy.cpu_max * CGROUP_PERIOD_US) if policy.cpu_max is not None else 'max'
+        self._write(os.path.join(path, 'cpu.max'), f'{quota} {CGROUP_PERIOD_US}')
+        self._write(os.path.join(path, 'memory.max'),
+                    str(policy.memory_max) if policy.memory_max is not None else 'max')
+        self._write(os.path.join(path, 'cgroup.procs'), str(pid))
+        return path
+
+    def remove(self, name: str):
+        """Remove a process's cgroup once it is empty"""
+        if not self.root:
+            return
+        try:
+            os.rmdir(self.group_path(name))
+        except OSError:
+            pass
+
+
+def confine_current_process(cpus: Set[int]) -> bool:
+    """Pin the web backend (the calling thread and every thread it starts later) to the given cores"""
+    try:
+        os.sched_setaffinity(0, cpus)
+        logger.info(f'Backend confined to CPU {format_cpu_list(cpus)}')
+        return True
+    except (OSError, ValueError) as e:
+        logger.warning(f'Cannot confine backend to CPU {format_cpu_list(cpus)}: {e}')
+        return False
@@ -0,0 +1,212 @@
+"""
+PTZ Channel - Executes compact PTZ command messages for persistent (WebSocket) clients
+"""
+import threading
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def coalesce_key(command: Dict) -> Optional[str]:
+    """Key under which a queued continuous-motion command may be replaced by a newer one, or None"""
+    op = command.get('op')
+    if op == 'move':
+        return 'move'
+    if op in ('zoom', 'focus') and 'speed' in command:
+        return f'{op}_speed'
+    return None
+
+
+def _vector(*values) -> str:
+    return '[' + ','.join(str(v) for v in values) + ']'
+
+
+def command_params(command: Dict) -> List[Tuple[str, Optional[str]]]:
+    """
+    Translate one PTZ command message into yuri control (command, value) pairs.
+    Raises ValueError for unknown ops or bad arguments.
+
+        {"op": "move", "pan": -1..1, "tilt": -1..1, "lease": ms (optional)}
+        {"op": "stop"}
+        {"op": "position", "pan": -1..1, "tilt": -1..1}
+        {"op": "zoom", "speed": -1..1, "lease": ms (optional)} | {"op": "zoom", "level": 0..1}
+        {"op": "focus", "auto": true} | {"op": "focus", "speed": ...} | {"op": "focus", "level": ...}
+        {"op": "preset", "recall": n, "speed": 0..1} | {"op": "preset", "store": n}
+        {"op": "whitebalance", "mode": "auto|indoor|outdoor|oneshot|manual", "red": .., "blue": ..}
+        {"op": "exposure", "auto": true} | {"op": "exposure", "level": 0..1}
+    """
+    op = command.get('op')
+    try:
+        if op == 'move':
+            return [('pan_tilt_speed', _vector(float(command.get('pan', 0)), float(command.get('tilt', 0))))]
+        if op == 'stop':
+            return [('pan_tilt_speed', '[0,0]'), ('zoom_speed', '0')]
+        if op == 'position':
+            return [('pan_tilt', _vector(float(command.get('pan', 0)), float(command.get('tilt', 0))))]
+        if op == 'zoom':
+            if 'speed' in command:
+                return [('zoom_speed', str(float(command['speed'])))]
+            if 'level' in command:
+                return [('zoom', str(float(command['level'])))]
+            raise ValueError('speed or level required')
+        if op == 'focus':
+            if command.get('auto'):
+                return [('auto_focus', None)]
+            if 'speed' in command:
+                return [('focus_speed', str(float(command['speed'])))]
+            if 'level' in command:
+                return [('focus', str(float(command['level'])))]
+            raise ValueError('auto, speed, or level required')
+        if op == 'preset':
+            if 'recall' in command:
+                return [('recall_preset', _vector(int(command['recall']), float(command.get('speed', 1.0))))]
+            if 'store' in command:
+                return [('store_preset', str(int(command['store'])))]
+            raise ValueError('recall or store required')
+        if op == 'whitebalance':
+            mode = command.get('mode', 'auto')
+            if mode in ('auto', 'indoor', 'outdoor', 'oneshot'):
+                return [(f'white_balance_{mode}', None)]
+            if mode == 'manual':
+                return [('white_balance_manual',
+                         _vector(float(command.get('red', 0.5)), float(command.get('blue', 0.5))))]
+            raise ValueError(f'Unknown mode: {mode}')
+        if op == 'exposure':
+            if command.get('auto'):
+                return [('exposure_auto', None)]
+            if 'level' in command:
+                return [('exposure_manual', str(float(command['level'])))]
+            raise ValueError('auto or level required')
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid '{op}' command: {e}")
+    raise ValueError(f'Unknown op: {op}')
+
+
+def execute_command(ptz, command: Dict) -> bool:
+    """Run one PTZ command message (see command_params). Raises ValueError for bad commands."""
+    params = command_params(command)
+    lease = command.get('lease')
+    if lease and command.get('op') == 'move':
+        return ptz.move_with_lease(float(command.get('pan', 0)), float(command.get('tilt', 0)), float(lease))
+    if lease and command.get('op') == 'zoom' and 'speed' in command:
+        return ptz.zoom_with_lease(float(command['speed']), float(lease))
+    return all(ptz.send_batch(params))
+
+
+def execute_batch(ptz, commands: List[Dict], single_request: bool = False) -> List[Dict]:
+    """
+    Run an ordered list of command messages; returns one result per command.
+    All commands are validated before anything is sent.
+    """
+    params = []
+    for index, command in enumerate(commands):
+        try:
+            params.append(command_params(command))
+        except ValueError as e:
+            raise ValueError(f'Command {index}: {e}')
+    if single_request:
+        flat = [pair for pairs in params for pair in pairs]
+        results = ptz.send_batch(flat, single_request=True)
+        ok, offset = [], 0
+        for pairs in params:
+            ok.append(all(results[offset:offset + len(pairs)]))
+            offset += len(pairs)
+    else:
+        ok = [all(ptz.send_batch(pairs)) for pairs in params]
+    return [{'op': command.get('op'), 'status': 'ok' if success else 'failed'}
+            for command, success in zip(commands, ok)]
+
+
+class PTZChannel:
+    """
+    Per-connection command queue.
+
+    Messages are queued as they arrive and executed in order by one worker
+    thread, so a client sending analog updates at 30-60 Hz never blocks its
+    receive loop or stacks up requests to the camera: a motion command that
+    is still queued when a newer one of the same kind arrives is replaced
+    (and acknowledged as coalesced). Every message with an "id" gets an ack:
+
+        {"ack": id, "ok": true|false}                 executed
+        {"ack": id, "ok": true, "coalesced": true}    superseded before it ran
+        {"ack": id, "ok": false, "error": "..."}      rejected
+    """
+
+    def __init__(self, ptz, send: Callable[[Dict], None]):
+        self.ptz = ptz
+        self.send = send
+        self.queue: Deque[Dict] = deque()
+        self.condition = threading.Condition()
+        self.closed = False
+        self.motion: Dict[str, bool] = {}  # coalesce key -> last speed was non-zero
+        self.metrics = ptz.metrics
+        self.metrics.adjust('channels', 1)
+        self._thread = threading.Thread(target=self._run, name='ptz-channel', daemon=True)
+        self._thread.start()
+
+    def submit(self, command: Dict):
+        """Queue a command, replacing a queued one it supersedes"""
+        key = coalesce_key(command)
+        superseded = None
+        with self.condition:
+            if key:
+                for i, queued in enumerate(self.queue):
+                    if coalesce_key(queued) == key:
+                        superseded = queued
+                        # Keep the position in the queue so ordering with other ops holds
+                        self.queue[i] = command
+                        break
+            if superseded is None:
+                self.queue.append(command)
+                self.metrics.adjust('channel_queue', 1)
+            self.condition.notify()
+        if superseded is not None:
+            self._ack(superseded, True, coalesced=True)
+
+    def close(self):
+        """Stop the worker; halts the camera if this client left it moving"""
+        with self.condition:
+            self.closed = True
+            self.metrics.adjust('channel_queue', -len(self.queue))
+            self.metrics.adjust('channels', -1)
+            self.queue.clear()
+            self.condition.notify()
+        self._thread.join(timeout=5)
+        if any(self.motion.values()):
+            self.ptz.stop()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.queue or self.closed)
+                if self.closed:
+                    return
+                command = self.queue.popleft()
+                self.metrics.adjust('channel_queue', -1)
+            try:
+                ok = execute_command(self.ptz, command)
+                self._track_motion(command)
+                self._ack(command, ok)
+            except ValueError as e:
+                self._ack(command, False, error=str(e))
+            except Exception as e:
+                logger.error(f"PTZ channel command failed: {e}")
+                self._ack(command, False, error=str(e))
+
+    def _track_motion(self, command: Dict):
+        key = coalesce_key(command)
+        if command.get('op') == 'stop':
+            self.motion.clear()
+        elif key:
+            self.motion[key] = any(float(command.get(k) or 0) != 0 for k in ('pan', 'tilt', 'speed'))
+
+    def _ack(self, command: Dict, ok: bool, **extra):
+        if 'id' not in command:
+            return
+        try:
+            self.send({'ack': command['id'], 'ok': ok, **extra})
+        except Exception:
+            # Client went away; the receive loop notices and closes the channel
+            pass
@@ -1,12 +1,40 @@
 """
 PTZ Controller - Sends PTZ commands to yuri via WebControlResource
 """
+import time
+import threading
 import requests
-from typing import Optional
+from requests.adapters import HTTPAdapter
+from typing import Optional, Dict, List, Tuple
 import logging
 
+from services.ptz_metrics import PTZMetrics
+
 logger = logging.getLogger(__name__)
 
+# Continuous-motion commands: only the newest value matters, so updates that
+# arrive while one is in flight are coalesced into a single request
+COALESCED_COMMANDS = ('pan_tilt_speed', 'pan_speed', 'tilt_speed', 'zoom_speed', 'focus_speed')
+
+# Absolute axes the controller keeps track of (as last commanded)
+POSITION_AXES = ('pan', 'tilt', 'zoom', 'focus')
+
+# Value sent when a motion lease expires
+LEASE_STOP_VALUES = {'pan_tilt_speed': '[0,0]', 'zoom_speed': '0'}
+MAX_LEASE_MS = 10000
+
+REQUEST_TIMEOUT = 2.0  # Seconds
+
+
+class _CommandSlot:
+    """Coalescing state for one command"""
+    def __init__(self):
+        self.busy = False
+        self.pending: Optional[str] = None
+        self.requested = 0  # Ticket of the newest queued value
+        self.completed = 0  # Ticket covered by the last finished request
+        self.result = False
+
 
 class PTZController:
     """
@@ -37,21 +65,294 @@ class PTZController:
 
     def __init__(self, control_url: str = 'http://localhost:8080/control'):
         self.control_url = control_url
+        # Keep-alive connections to yuri, reused by every command
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=len(COALESCED_COMMANDS) + 2, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.slots: Dict[str, _CommandSlot] = {}
+        self.condition = threading.Condition()
+        # Deadman leases: command -> (value, deadline)
+        self.leases: Dict[str, Tuple[str, float]] = {}
+        self.lease_condition = threading.Condition()
+        self._lease_thread: Optional[threading.Thread] = None
+        # Last commanded absolute position; None where a speed move made it unknown
+        self.position: Dict[str, Optional[float]] = dict.fromkeys(POSITION_AXES)
+        self._glide_generation = 0
+        self.metrics = PTZMetrics()
 
     def set_control_url(self, url: str):
         """Update the control URL"""
         self.control_url = url
 
+    def close(self):
+        """Close pooled connections"""
+        self.session.close()
+
     def _send_command(self, command: str, value: Optional[str] = None) -> bool:
-        """Send a PTZ command via yuri's WebControlResource"""
+        """Send a PTZ command via yuri's WebControlResource; any command ends a running glide"""
+        self._cancel_glide()
+        started = time.monotonic()
+        if command in COALESCED_COMMANDS:
+            success = self._send_latest(command, value)
+        else:
+            success = self._request(command, value)
+        self.metrics.observe_command(command, time.monotonic() - started)
+        return success
+
+    def _request(self, command: str, value: Optional[str] = None) -> bool:
+        """One HTTP request on a pooled keep-alive connection"""
+        return self._request_params([(command, value)])
+
+    def _request_params(self, commands: List[Tuple[str, Optional[str]]]) -> bool:
+        """One HTTP request carrying one or more commands in its query string, in order"""
+        label = commands[0][0] if len(commands) == 1 else 'batch'
+        success = timed_out = False
+        self.metrics.adjust('in_flight', 1)
+        started = time.monotonic()
         try:
-            params = {command: value if value is not None else ''}
-            logger.debug(f"Sending PTZ command: {command}={value}")
-            response = requests.get(self.control_url, params=params, timeout=2)
-            return response.status_code in (200, 302, 303)
+            params = [(command, value if value is not None else '') for command, value in commands]
+            logger.debug(f"Sending PTZ command(s): {params}")
+            response = self.session.get(self.control_url, params=params, timeout=REQUEST_TIMEOUT,
+                                        allow_redirects=False)
+            success = response.status_code in (200, 302, 303)
+        except requests.Timeout as e:
+            timed_out = True
+            logger.warning(f"PTZ command timed out: {e}")
         except requests.RequestException as e:
             logger.warning(f"PTZ command failed: {e}")
+        finally:
+            self.metrics.adjust('in_flight', -1)
+            self.metrics.observe_request(label, time.monotonic() - started, success, timed_out)
+        if success:
+            self._track_position(commands)
+        return success
+
+    def _track_position(self, commands: List[Tuple[str, Optional[str]]]):
+        """Update the last commanded position from commands that were sent"""
+        for command, value in commands:
+            try:
+                values = [float(v) for v in (value or '').strip('[]').split(',') if v.strip()]
+            except ValueError:
+                continue
+            moving = any(v != 0 for v in values)
+            if command == 'pan_tilt' and len(values) == 2:
+                self.position['pan'], self.position['tilt'] = values
+            elif command in POSITION_AXES and values:
+                self.position[command] = values[0]
+            elif command == 'pan_tilt_speed' and moving:
+                self.position['pan'] = self.position['tilt'] = None
+            elif command in ('pan_speed', 'tilt_speed', 'zoom_speed', 'focus_speed') and moving:
+                self.position[command[:-len('_speed')]] = None
+            elif command == 'auto_focus':
+                self.position['focus'] = None
+            elif command == 'recall_preset':
+                self.position = dict.fromkeys(POSITION_AXES)
+
+    def get_position(self) -> Dict[str, Optional[float]]:
+        """Last commanded absolute position (None where unknown)"""
+        return dict(self.position)
+
+    def set_known_position(self, position: Dict[str, Optional[float]]):
+        """Record a position the camera was sent to by other means (e.g. a native preset recall)"""
+        for axis in POSITION_AXES:
+            if position.get(axis) is not None:
+                self.position[axis] = float(position[axis])
+
+    def glide_to(self, target: Dict[str, Optional[float]], duration: float, tick_hz: float = 20.0,
+                 single_request: bool = False) -> bool:
+        """
+        Server-driven interpolated move to an absolute position.
+
+        Absolute pan_tilt / zoom / focus commands are sent at tick_hz over the
+        pooled connection, easing from the last commanded position to target
+        over duration seconds. Axes whose start is unknown jump on the first
+        tick. Runs in the background; any other command cancels it.
+        Returns False if target has no axes.
+        """
+        axes = [axis for axis in POSITION_AXES if target.get(axis) is not None]
+        if not axes:
             return False
+        self._cancel_lease('pan_tilt_speed')
+        self._cancel_lease('zoom_speed')
+        generation = self._cancel_glide()
+        start = self.get_position()
+        threading.Thread(target=self._run_glide, name='ptz-glide', daemon=True,
+                         args=(generation, start, target, axes, duration, tick_hz, single_request)).start()
+        return True
+
+    def _cancel_glide(self) -> int:
+        with self.lease_condition:
+            self._glide_generation += 1
+            return self._glide_generation
+
+    def _run_glide(self, generation: int, start: Dict, target: Dict, axes: List[str],
+                   duration: float, tick_hz: float, single_request: bool):
+        steps = max(1, int(duration * tick_hz))
+        interval = 1.0 / tick_hz
+        began = time.monotonic()
+        for step in range(1, steps + 1):
+            if self._glide_generation != generation:
+                return
+            t = step / steps
+            eased = t * t * (3 - 2 * t)  # smoothstep: gentle start and stop
+            point = {}
+            for axis in axes:
+                origin = start.get(axis)
+                point[axis] = target[axis] if origin is None else origin + (target[axis] - origin) * eased
+
+            commands = []
+            if 'pan' in point and 'tilt' in point:
+                commands.append(('pan_tilt', f"[{point['pan']:.4f},{point['tilt']:.4f}]"))
+                axes_left = ('zoom', 'focus')
+            else:
+                axes_left = POSITION_AXES
+            for axis in axes_left:
+                if axis in point:
+                    commands.append((axis, f'{point[axis]:.4f}'))
+
+            if single_request:
+                self._request_params(commands)
+            else:
+                for command in commands:
+                    self._request_params([command])
+
+            delay = began + step * interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+    def _send_latest(self, command: str, value: Optional[str]) -> bool:
+        """
+        Send a continuous-motion command, coalescing with concurrent callers.
+
+        At most one request per command is in flight. Values arriving
+        meanwhile replace each other; when the request completes, one waiting
+        caller sends the newest value on behalf of all of them. Callers whose
+        value was superseded return the result of the request that covered it.
+        """
+        with self.condition:
+            slot = self.slots.setdefault(command, _CommandSlot())
+            slot.requested += 1
+            ticket = slot.requested
+            slot.pending = value
+            self.metrics.adjust('coalesce_waiting', 1)
+            try:
+                while True:
+                    if slot.completed >= ticket:
+                        return slot.result
+                    if not slot.busy:
+                        break
+                    self.condition.wait()
+            finally:
+                self.metrics.adjust('coalesce_waiting', -1)
+            slot.busy = True
+            value, covered = slot.pending, slot.requested
+            slot.pending = None
+            # Values queued since the last request that this one supersedes
+            self.metrics.count_coalesced(command, covered - slot.completed - 1)
+
+        success = False
+        try:
+            success = self._request(command, value)
+        finally:
+            with self.condition:
+                slot.busy = False
+                slot.completed = covered
+                slot.result = success
+                self.condition.notify_all()
+        return success
+
+    def _send_leased(self, command: str, value: str, lease_ms: float) -> bool:
+        """
+        Start or renew a deadman lease on a motion command.
+
+        The value is sent only when it changes; a renewal with the same value
+        just pushes the deadline out. If no renewal arrives within lease_ms,
+        the lease thread sends the stop value for the command.
+        """
+        lease_ms = min(max(float(lease_ms), 1.0), MAX_LEASE_MS)
+        with self.lease_condition:
+            current = self.leases.get(command)
+            self.leases[command] = (value, time.monotonic() + lease_ms / 1000.0)
+            if self._lease_thread is None or not self._lease_thread.is_alive():
+                self._lease_thread = threading.Thread(target=self._run_leases, name='ptz-leases', daemon=True)
+                self._lease_thread.start()
+            self.lease_condition.notify_all()
+
+        if current is not None and current[0] == value:
+            return True
+        success = self._send_command(command, value)
+        if not success:
+            # Make the next renewal retry the send
+            with self.lease_condition:
+                if self.leases.get(command, (None,))[0] == value:
+                    self.leases[command] = ('', self.leases[command][1])
+        return success
+
+    def send_batch(self, commands: List[Tuple[str, Optional[str]]], single_request: bool = False) -> List[bool]:
+        """
+        Send several (command, value) pairs in order; returns one result per pair.
+
+        With single_request they go out as one query string (one round trip),
+        provided no command appears twice; otherwise each is sent in turn on
+        the pooled connection. Either way they replace any lease on the same
+        command.
+        """
+        for command, _ in commands:
+            self._cancel_lease(command)
+        names = [command for command, _ in commands]
+        if single_request and len(set(names)) == len(names):
+            self._cancel_glide()
+            started = time.monotonic()
+            success = self._request_params(commands)
+            self.metrics.observe_command('batch', time.monotonic() - started)
+            return [success] * len(commands)
+        return [self._send_command(command, value) for command, value in commands]
+
+    def get_metrics(self) -> Dict:
+        """Latency histograms, error counters and queue gauges (see services.ptz_metrics)"""
+        return self.metrics.snapshot(leases=self._lease_count())
+
+    def get_prometheus_metrics(self, target: str) -> Dict[str, List[str]]:
+        return self.metrics.prometheus_lines(target, leases=self._lease_count())
+
+    def _lease_count(self) -> int:
+        with self.lease_condition:
+            return len(self.leases)
+
+    def _cancel_lease(self, command: str):
+        with self.lease_condition:
+            self.leases.pop(command, None)
+
+    def _run_leases(self):
+        """Send the stop value for every lease that runs out before it is renewed"""
+        while True:
+            with self.lease_condition:
+                if not self.leases:
+                    self._lease_thread = None
+                    return
+                now = time.monotonic()
+                expired = [command for command, (_, deadline) in self.leases.items() if deadline <= now]
+                for command in expired:
+                    del self.leases[command]
+                if not expired:
+                    next_deadline = min(deadline for _, deadline in self.leases.values())
+                    self.lease_condition.wait(next_deadline - now)
+                    continue
+
+            for command in expired:
+                with self.lease_condition:
+                    if command in self.leases:
+                        # Renewed since it expired; that renewal sends the move
+                        continue
+                logger.info(f"PTZ lease on '{command}' expired, stopping")
+                self._send_command(command, LEASE_STOP_VALUES[command])
+                with self.lease_condition:
+                    lease = self.leases.get(command)
+                    if lease is not None:
+                        # Renewed while the stop went out, so the stop may have overtaken
+                        # its move; make the next renewal send the move again
+                        self.leases[command] = ('', lease[1])
 
     # Position commands (absolute)
     def set_pan_tilt(self, pan: float, tilt: float) -> bool:
@@ -69,8 +370,18 @@ class PTZController:
     # Speed commands (for continuous movement)
     def set_pan_tilt_speed(self, pan_speed: float, tilt_speed: float) -> bool:
         """Set pan/tilt speed (-1.0 to 1.0, 0 = stop)"""
+        self._cancel_lease('pan_tilt_speed')
         return self._send_command('pan_tilt_speed', f'[{pan_speed},{tilt_speed}]')
 
+    def move_with_lease(self, pan_speed: float, tilt_speed: float, lease_ms: float) -> bool:
+        """
+        Pan/tilt at the given speed until the lease runs out; call again
+        within lease_ms to keep moving (only changed speeds are sent).
+        """
+        if pan_speed == 0 and tilt_speed == 0:
+            return self.set_pan_tilt_speed(0, 0)
+        return self._send_leased('pan_tilt_speed', f'[{pan_speed},{tilt_speed}]', lease_ms)
+
     def set_pan_speed(self, speed: float) -> bool:
         """Set pan speed (-1.0 to 1.0)"""
         return self._send_command('pan_speed', str(speed))
@@ -82,7 +393,7 @@ class PTZController:
     def stop(self) -> bool:
         """Stop all movement"""
         success = self.set_pan_tilt_speed(0, 0)
-        success = self._send_command('zoom_speed', '0') and success
+        success = self.set_zoom_speed(0) and success
         return success
 
     # Zoom
@@ -92,8 +403,15 @@ class PTZController:
 
     def set_zoom_speed(self, speed: float) -> bool:
         """Set zoom speed (-1.0 to 1.0)"""
+        self._cancel_lease('zoom_speed')
         return self._send_command('zoom_speed', str(speed))
 
+    def zoom_with_lease(self, speed: float, lease_ms: float) -> bool:
+        """Zoom at the given speed until the lease runs out (see move_with_lease)"""
+        if speed == 0:
+            return self.set_zoom_speed(0)
+        return self._send_leased('zoom_speed', str(speed), lease_ms)
+
     # Focus
     def set_focus(self, focus: float) -> bool:
         """Set focus level (0.0 to 1.0)"""
@@ -0,0 +1,197 @@
+"""
+PTZ Metrics - Latency histograms, error counters and queue gauges for PTZ commands
+"""
+import time
+from collections import deque
+from threading import Lock
+from typing import Deque, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in seconds (the request timeout is 2 s)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0)
+QUANTILES = (0.5, 0.95, 0.99)
+RECENT_SAMPLES = 512  # Per command; quantiles are computed over these
+
+GAUGES = ('in_flight', 'coalesce_waiting', 'channel_queue', 'channels')
+
+
+class LatencyHistogram:
+    """Cumulative-bucket histogram plus a window of recent samples for quantiles"""
+
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.recent: Deque[float] = deque(maxlen=RECENT_SAMPLES)
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.sum += seconds
+        self.recent.append(seconds)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+
+    def quantiles(self) -> Dict[str, Optional[float]]:
+        samples = sorted(self.recent)
+        result = {}
+        for q in QUANTILES:
+            key = f'p{int(q * 100)}'
+            if samples:
+                result[key] = round(samples[min(len(samples) - 1, int(q * len(samples)))] * 1000, 2)
+            else:
+                result[key] = None
+        return result
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'mean_ms': round(self.sum / self.count * 1000, 2) if self.count else None,
+            **{f'{key}_ms': value for key, value in self.quantiles().items()}
+        }
+
+
+class _CommandStats:
+    """Counters for one command type"""
+    def __init__(self):
+        self.command = LatencyHistogram()  # Caller's view: includes waiting in the controller
+        self.request = LatencyHistogram()  # HTTP round trip to yuri / the camera
+        self.failures = 0
+        self.timeouts = 0
+        self.coalesced = 0
+
+
+class PTZMetrics:
+    """
+    Instrumentation for one PTZController.
+
+    Two latencies are recorded per command type: 'request' is the HTTP round
+    trip to yuri's control port (camera lag), 'command' is what the caller
+    saw, including time spent waiting for a coalesced request to go out
+    (controller lag). Requests carrying several commands in one query
+    string are recorded as 'batch'.
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.stats: Dict[str, _CommandStats] = {}
+        self.gauges: Dict[str, int] = dict.fromkeys(GAUGES, 0)
+        self.started_at = time.time()
+
+    def _stats(self, command: str) -> _CommandStats:
+        stats = self.stats.get(command)
+        if stats is None:
+            stats = self.stats[command] = _CommandStats()
+        return stats
+
+    def observe_request(self, command: str, seconds: float, ok: bool, timeout: bool = False):
+        with self.lock:
+            stats = self._stats(command)
+            stats.request.observe(seconds)
+            if not ok:
+                stats.failures += 1
+            if timeout:
+                stats.timeouts += 1
+
+    def observe_command(self, command: str, seconds: float):
+        with self.lock:
+            self._stats(command).command.observe(seconds)
+
+    def count_coalesced(self, command: str, count: int = 1):
+        """Queued values that were superseded before they were sent"""
+        if count <= 0:
+            return
+        with self.lock:
+            self._stats(command).coalesced += count
+
+    def adjust(self, gauge: str, delta: int):
+        with self.lock:
+            self.gauges[gauge] = max(0, self.gauges[gauge] + delta)
+
+    def snapshot(self, **extra_gauges) -> Dict:
+        """JSON-friendly copy of every metric"""
+        with self.lock:
+            commands = {
+                name: {
+                    'request': stats.request.to_dict(),
+                    'command': stats.command.to_dict(),
+                    'failures': stats.failures,
+                    'timeouts': stats.timeouts,
+                    'coalesced': stats.coalesced
+                }
+                for name, stats in sorted(self.stats.items())
+            }
+            gauges = dict(self.gauges, **extra_gauges)
+        return {
+            'since': self.started_at,
+            'requests': sum(c['request']['count'] for c in commands.values()),
+            'failures': sum(c['failures'] for c in commands.values()),
+            'timeouts': sum(c['timeouts'] for c in commands.values()),
+            'gauges': gauges,
+            'commands': commands
+        }
+
+    def prometheus_lines(self, target: str, **extra_gauges) -> Dict[str, List[str]]:
+        """Sample lines for each metric family, labelled with the target"""
+        families: Dict[str, List[str]] = {}
+
+        def add(family: str, labels: Dict[str, str], value):
+            label_text = ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+            families.setdefault(family, []).append(f'{family}{{{label_text}}} {value}')
+
+        with self.lock:
+            for name, stats in sorted(self.stats.items()):
+                labels = {'target': target, 'command': name}
+                for family, histogram in (('ptz_request_duration_seconds', stats.request),
+                                          ('ptz_command_duration_seconds', stats.command)):
+                    for bound, count in zip(LATENCY_BUCKETS, histogram.buckets):
+                        add(f'{family}_bucket', dict(labels, le=repr(bound)), count)
+                    add(f'{family}_bucket', dict(labels, le='+Inf'), histogram.count)
+                    add(f'{family}_sum', labels, round(histogram.sum, 6))
+                    add(f'{family}_count', labels, histogram.count)
+                add('ptz_request_failures_total', labels, stats.failures)
+                add('ptz_request_timeouts_total', labels, stats.timeouts)
+                add('ptz_commands_coalesced_total', labels, stats.coalesced)
+            gauges = dict(self.gauges, **extra_gauges)
+        for gauge, value in gauges.items():
+            add(f'ptz_{gauge}', {'target': target}, value)
+        return families
+
+
+PROMETHEUS_HELP = {
+    'ptz_request_duration_seconds': ('histogram', 'HTTP round trip of PTZ control requests to yuri'),
+    'ptz_command_duration_seconds': ('histogram', 'PTZ command latency seen by the caller, including queueing'),
+    'ptz_request_failures_total': ('counter', 'PTZ control requests that failed (including timeouts)'),
+    'ptz_request_timeouts_total': ('counter', 'PTZ control requests that timed out'),
+    'ptz_commands_coalesced_total': ('counter', 'PTZ motion values superseded before they were sent'),
+    'ptz_in_flight': ('gauge', 'PTZ control requests currently in flight'),
+    'ptz_coalesce_waiting': ('gauge', 'PTZ callers waiting for a coalesced request'),
+    'ptz_channel_queue': ('gauge', 'Commands queued on PTZ WebSocket channels'),
+    'ptz_channels': ('gauge', 'Open PTZ WebSocket channels'),
+    'ptz_leases': ('gauge', 'Active PTZ motion leases'),
+}
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_prometheus(families_by_target: List[Dict[str, List[str]]]) -> str:
+    """Prometheus text exposition format for the metric families of several targets"""
+    merged: Dict[str, List[str]] = {}
+    for families in families_by_target:
+        for family, lines in families.items():
+            merged.setdefault(family, []).extend(lines)
+
+    output = []
+    for base, (kind, text) in PROMETHEUS_HELP.items():
+        names = [base + suffix for suffix in ('_bucket', '_sum', '_count')] if kind == 'histogram' else [base]
+        lines = [line for name in names for line in merged.get(name, [])]
+        if not lines:
+            continue
+        output.append(f'# HELP {base} {text}')
+        output.append(f'# TYPE {base} {kind}')
+        output.extend(lines)
+    return '\n'.join(output) + '\n'
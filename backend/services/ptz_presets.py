@@ -0,0 +1,100 @@
+"""
+PTZ Preset Store - Per-camera preset positions kept in memory and persisted to disk
+"""
+import os
+import json
+import time
+from typing import Optional, Dict, List
+from threading import Lock
+import logging
+
+from services.ptz_controller import POSITION_AXES
+
+logger = logging.getLogger(__name__)
+
+
+class PTZPresetStore:
+    """
+    Remembers what each preset contains (pan, tilt, zoom, focus and a name)
+    per PTZ target, so presets can be listed and shown without asking the
+    camera, and recalled as a server-driven interpolated move.
+
+    Everything is served from memory; the JSON file is only written on change.
+    """
+
+    def __init__(self, presets_file: str):
+        self.presets_file = presets_file
+        self.lock = Lock()
+        self.presets: Dict[str, Dict[str, Dict]] = self._load_presets()
+
+    def _load_presets(self) -> Dict[str, Dict[str, Dict]]:
+        """Load presets from file"""
+        if not os.path.exists(self.presets_file):
+            return {}
+        try:
+            with open(self.presets_file, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Failed to load PTZ presets: {e}")
+            return {}
+
+    def _save_presets(self):
+        """Save presets to file (written to a temp file and renamed into place)"""
+        os.makedirs(os.path.dirname(self.presets_file), exist_ok=True)
+        tmp_path = f'{self.presets_file}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.presets, f, indent=2)
+        os.replace(tmp_path, self.presets_file)
+
+    def list_presets(self, target: str) -> List[Dict]:
+        with self.lock:
+            presets = self.presets.get(target, {})
+            return [dict(presets[key], preset=int(key)) for key in sorted(presets, key=int)]
+
+    def get_preset(self, target: str, preset: int) -> Optional[Dict]:
+        with self.lock:
+            entry = self.presets.get(target, {}).get(str(preset))
+            return dict(entry, preset=preset) if entry else None
+
+    def set_preset(self, target: str, preset: int, position: Dict[str, Optional[float]],
+                   name: Optional[str] = None, merge: bool = False) -> Dict:
+        """
+        Record (or overwrite) a preset. Axes missing from position are stored
+        as None (unknown), or with merge kept from the old entry.
+        """
+        with self.lock:
+            presets = self.presets.setdefault(target, {})
+            old = presets.get(str(preset), {})
+            entry = {'name': old['name']} if 'name' in old else {}
+            for axis in POSITION_AXES:
+                if position.get(axis) is not None:
+                    entry[axis] = float(position[axis])
+                else:
+                    entry[axis] = old.get(axis) if merge else None
+            if name is not None:
+                entry['name'] = name
+            entry.setdefault('name', f'Preset {preset}')
+            entry['updated_at'] = time.time()
+            presets[str(preset)] = entry
+            self._save_presets()
+            return dict(entry, preset=preset)
+
+    def delete_preset(self, target: str, preset: int) -> bool:
+        with self.lock:
+            presets = self.presets.get(target, {})
+            if str(preset) not in presets:
+                return False
+            del presets[str(preset)]
+            if not presets:
+                self.presets.pop(target, None)
+            self._save_presets()
+            return True
+
+    def delete_target(self, target: str) -> int:
+        """Drop every preset of a target; returns how many there were"""
+        with self.lock:
+            presets = self.presets.pop(target, None)
+            if not presets:
+                return 0
+            self._save_presets()
+            return len(presets)
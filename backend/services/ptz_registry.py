@@ -0,0 +1,121 @@
+"""
+PTZ Registry - One PTZController per camera control endpoint
+"""
+import os
+import json
+from typing import Optional, Dict, List
+from threading import Lock
+import logging
+
+from services.ptz_controller import PTZController
+from services.ptz_metrics import render_prometheus
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TARGET = 'default'
+
+
+class UnknownPTZTarget(KeyError):
+    """Raised when a PTZ target name is not registered"""
+
+
+class PTZRegistry:
+    """
+    Maps PTZ target names (usually the NDI source name of the camera) to
+    control endpoints.
+
+    Every target gets its own PTZController, and with it its own connection
+    pool, coalescing queues and deadman leases, so commands to different
+    cameras run concurrently and a slow camera never holds up another.
+    The 'default' target is the control endpoint of the local yuri graph;
+    other targets are persisted in a JSON file.
+    """
+
+    def __init__(self, targets_file: str, default_url: str):
+        self.targets_file = targets_file
+        self.lock = Lock()
+        self.urls: Dict[str, str] = {DEFAULT_TARGET: default_url}
+        self.controllers: Dict[str, PTZController] = {}
+        self.urls.update(self._load_targets())
+
+    def _load_targets(self) -> Dict[str, str]:
+        """Load saved targets from file"""
+        if not os.path.exists(self.targets_file):
+            return {}
+        try:
+            with open(self.targets_file, 'r') as f:
+                targets = json.load(f)
+            return {name: url for name, url in targets.items() if name != DEFAULT_TARGET}
+        except Exception as e:
+            logger.error(f"Failed to load PTZ targets: {e}")
+            return {}
+
+    def _save_targets(self):
+        """Save targets (except the default one) to file"""
+        os.makedirs(os.path.dirname(self.targets_file), exist_ok=True)
+        targets = {name: url for name, url in self.urls.items() if name != DEFAULT_TARGET}
+        with open(self.targets_file, 'w') as f:
+            json.dump(targets, f, indent=2)
+
+    def get(self, target: Optional[str] = None) -> PTZController:
+        """Controller for a target (the default one if target is None)"""
+        target = target or DEFAULT_TARGET
+        with self.lock:
+            controller = self.controllers.get(target)
+            if controller is None:
+                if target not in self.urls:
+                    raise UnknownPTZTarget(target)
+                controller = PTZController(control_url=self.urls[target])
+                self.controllers[target] = controller
+            return controller
+
+    def set_target(self, name: str, control_url: str):
+        """Add a target or change its control URL"""
+        with self.lock:
+            self.urls[name] = control_url
+            if name in self.controllers:
+                self.controllers[name].set_control_url(control_url)
+            if name != DEFAULT_TARGET:
+                self._save_targets()
+        logger.info(f"PTZ target '{name}' -> {control_url}")
+
+    def remove_target(self, name: str) -> bool:
+        """Remove a target; the default target cannot be removed"""
+        if name == DEFAULT_TARGET:
+            return False
+        with self.lock:
+            if name not in self.urls:
+                return False
+            del self.urls[name]
+            controller = self.controllers.pop(name, None)
+            self._save_targets()
+        if controller:
+            controller.close()
+        return True
+
+    def list_targets(self) -> List[Dict]:
+        with self.lock:
+            return [{'name': name, 'url': url, 'default': name == DEFAULT_TARGET}
+                    for name, url in self.urls.items()]
+
+    def get_metrics(self, target: Optional[str] = None) -> Dict[str, Dict]:
+        """Metrics of every target that has sent commands (or of one target)"""
+        if target is not None:
+            return {target: self.get(target).get_metrics()}
+        with self.lock:
+            controllers = dict(self.controllers)
+        return {name: controller.get_metrics() for name, controller in controllers.items()}
+
+    def get_prometheus_metrics(self) -> str:
+        """Metrics of every target in Prometheus text format"""
+        with self.lock:
+            controllers = dict(self.controllers)
+        return render_prometheus([controller.get_prometheus_metrics(name)
+                                  for name, controller in sorted(controllers.items())])
+
+    def close(self):
+        """Close every controller's pooled connections"""
+        with self.lock:
+            controllers = list(self.controllers.values())
+        for controller in controllers:
+            controller.close()
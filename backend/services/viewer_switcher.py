@@ -0,0 +1,50 @@
+"""
+Viewer Switcher - Changes the viewer's NDI source and reports how long the switch took
+"""
+import time
+from typing import Optional, Dict
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ViewerSwitcher:
+    """
+    Switches the source of the running viewer graph.
+
+    yuri is built here without its webserver module, and the control
+    interface gives no way to read back which stream ndi_input receives,
+    so a retarget of the running graph could not be confirmed. A switch
+    therefore restarts the viewer with the new config. The restart runs as
+    a job with a readiness probe instead of a fixed sleep (see YuriManager),
+    and switch_ms in the response is the time until the restarted viewer
+    was ready.
+
+    The generated config is always rewritten first, so a later automatic
+    restart comes back on the new source.
+    """
+
+    def __init__(self, yuri_manager, process_name: str):
+        self.yuri_manager = yuri_manager
+        self.process_name = process_name
+        # Source of the running viewer graph
+        self.source: Optional[str] = None
+
+    def started(self, source: Optional[str]):
+        """Record the source of a viewer that was (re)started, or None once stopped"""
+        self.source = source
+        self.yuri_manager.set_source(self.process_name, source)
+
+    def switch(self, config_path: str, source: str, wait: bool = True) -> Dict:
+        """Switch the viewer to source (config_path already rendered for it)"""
+        began = time.monotonic()
+        # Report the new source from the first event of the restart on
+        self.yuri_manager.set_source(self.process_name, source)
+        result = self.yuri_manager.restart_process(self.process_name, config_path, wait=wait)
+        if result.get('status') == 'error':
+            self.yuri_manager.set_source(self.process_name, self.source)
+            return result
+        self.started(source)
+        result['switch_ms'] = round((time.monotonic() - began) * 1000, 1)
+        logger.info(f"Viewer restarted for '{source}' ({result['switch_ms']} ms)")
+        return result
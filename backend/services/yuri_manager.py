@@ -4,25 +4,53 @@ Yuri Process Manager - Manages yuri2 process lifecycle
 import subprocess
 import os
 import signal
+import socket
 import time
 import glob
 import shutil
-from typing import Optional, Dict
+import threading
+from collections import deque
+from typing import Callable, Deque, Optional, Dict, List
 from threading import Lock
 import logging
 
+from services.config_generator import PREVIEW_DIR
+from services.process_log import ProcessLog
+from services.process_metrics import thread_count
+from services.process_scheduling import SchedulingPolicy, CgroupManager
+
 logger = logging.getLogger(__name__)
 
-PREVIEW_DIR = '/dev/shm/extrashot_preview'
+
+PROCESS_STATES = ('starting', 'running', 'stopping', 'stopped', 'failed', 'backoff', 'crash_loop')
+READY_POLL_INTERVAL = 0.05
+RESTART_POLICIES = ('never', 'on-failure', 'always')
 
 
 class YuriProcess:
     """Represents a running yuri process"""
-    def __init__(self, name: str, config_path: str, process: subprocess.Popen):
+    def __init__(self, name: str, config_path: str, process: subprocess.Popen,
+                 preview_renditions: Optional[List[str]] = None, ready_port: Optional[int] = None,
+                 scheduling: Optional[SchedulingPolicy] = None):
         self.name = name
         self.config_path = config_path
         self.process = process
+        self.preview_renditions = preview_renditions or []
+        self.ready_port = ready_port
+        self.scheduling = scheduling or SchedulingPolicy()
+        self.scheduling_problems: List[str] = []
+        self.cgroup: Optional[str] = None
         self.started_at = time.time()
+        self.stopping = False
+        self.state = 'starting'
+        self.ready_signal: Optional[str] = None
+        self.startup_seconds: Optional[float] = None
+        self.exit_code: Optional[int] = None
+        self.error: Optional[str] = None
+        # Set once the start job has checked whether the process came up; an
+        # exit it saw is reported by it (exit_reported), any later one by the watcher
+        self.start_checked = threading.Event()
+        self.exit_reported = False
 
     @property
     def is_running(self) -> bool:
@@ -33,11 +61,80 @@ class YuriProcess:
         return time.time() - self.started_at
 
 
+class _Supervision:
+    """Restart bookkeeping for one process name, kept across restarts"""
+    def __init__(self):
+        self.generation = 0  # Bumped by every start/stop request; cancels a pending restart
+        # (config_path, preview_renditions, ready_port, scheduling) of the last start
+        self.spec: Optional[tuple] = None
+        self.restarts = 0
+        self.last_exit_code: Optional[int] = None
+        self.last_exit_at: Optional[float] = None
+        self.exits: Deque[float] = deque()  # Within the crash-loop window
+        self.delay = 0.0
+        self.next_restart_at: Optional[float] = None
+        self.crash_loop = False
+
+    def reset(self):
+        """An operator (re)started or stopped the process: forget the crash history"""
+        self.generation += 1
+        self.exits.clear()
+        self.delay = 0.0
+        self.next_restart_at = None
+        self.crash_loop = False
+
+
+class _Job:
+    """One queued lifecycle operation for a process"""
+    def __init__(self, action: Callable, args: tuple):
+        self.action = action
+        self.args = args
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[Exception] = None
+
+
+def _port_open(port: int) -> bool:
+    try:
+        with socket.create_connection(('127.0.0.1', port), timeout=0.2):
+            return True
+    except OSError:
+        return False
+
+
 class YuriManager:
-    """Manages multiple yuri processes"""
+    """
+    Manages multiple yuri processes.
+
+    Start, stop and restart run as jobs on a per-process worker thread, so
+    stopping an old process or waiting for a new one to come up never holds
+    the manager lock; jobs for the same process run in order. Each process
+    moves through starting -> running -> stopping -> stopped (or failed),
+    and status reads return the latest immutable snapshot without locking.
+
+    A watcher thread per process blocks in wait() and reaps it the moment it
+    exits. Exits nobody asked for are restarted according to restart_policy
+    after an exponential backoff (state 'backoff'); more than
+    crash_loop_restarts exits within crash_loop_window seconds stop the
+    retries (state 'crash_loop') until the process is started again.
+
+    Every process runs under a SchedulingPolicy (the manager's default unless
+    the start gives one). CPU affinity, nice and SCHED_FIFO are applied right
+    after the spawn, to every thread the process has by then (threads yuri
+    creates later inherit them), together with the cgroup CPU/memory limits;
+    until then the process briefly runs unpinned at default priority. What
+    the kernel refused is reported in the status.
+    """
 
     def __init__(self, yuri_bin: str, config_dir: str, extra_ips_file: str,
-                 lib_path: str = '/usr/local/lib', ndi_lib_path: str = '/usr/local/lib/libndi.so.6'):
+                 lib_path: str = '/usr/local/lib', ndi_lib_path: str = '/usr/local/lib/libndi.so.6',
+                 event_bus=None, preview_hub=None, ready_timeout: float = 5.0,
+                 log_lines: int = 2000, log_dir: Optional[str] = None,
+                 log_max_bytes: int = 1024 * 1024, log_backups: int = 3,
+                 restart_policy: str = 'on-failure', restart_backoff: float = 1.0,
+                 restart_backoff_max: float = 60.0, crash_loop_window: float = 60.0,
+                 crash_loop_restarts: int = 5, scheduling: Optional[SchedulingPolicy] = None,
+                 cgroup_root: Optional[str] = None):
         self.yuri_bin = yuri_bin
         self.config_dir = config_dir
         self.extra_ips_file = extra_ips_file
@@ -45,6 +142,30 @@ class YuriManager:
         self.ndi_lib_path = ndi_lib_path
         self.processes: Dict[str, YuriProcess] = {}
         self.lock = Lock()
+        self.event_bus = event_bus
+        self.preview_hub = preview_hub
+        self.previews: Dict[str, List[str]] = {}  # pipeline -> renditions being produced
+        self.ready_timeout = ready_timeout
+        # Replaced on every change, never mutated, so readers need no lock
+        self.snapshots: Dict[str, Dict] = {}
+        self.jobs: Dict[str, Deque[_Job]] = {}
+        # stdout/stderr of each process name, kept across restarts
+        self.logs: Dict[str, ProcessLog] = {}
+        self.log_settings = {'max_lines': log_lines, 'log_dir': log_dir or None,
+                             'max_bytes': log_max_bytes, 'backups': log_backups}
+        if restart_policy not in RESTART_POLICIES:
+            logger.warning(f"Unknown restart policy '{restart_policy}', using 'on-failure'")
+            restart_policy = 'on-failure'
+        self.restart_policy = restart_policy
+        self.restart_backoff = restart_backoff
+        self.restart_backoff_max = restart_backoff_max
+        self.crash_loop_window = crash_loop_window
+        self.crash_loop_restarts = crash_loop_restarts
+        self.supervision: Dict[str, _Supervision] = {}
+        # What each receiving process is tuned to (e.g. the viewer's NDI source), reported in its status
+        self.sources: Dict[str, str] = {}
+        self.default_scheduling = scheduling or SchedulingPolicy()
+        self.cgroups = CgroupManager(cgroup_root or None)
 
         # Ensure config directory exists
         os.makedirs(config_dir, exist_ok=True)
@@ -67,71 +188,405 @@ class YuriManager:
 
         return env
 
-    def _setup_preview_dir(self):
-        """Create and clean the preview directory"""
+    def scheduling_for(self, overrides: Optional[Dict]) -> SchedulingPolicy:
+        """
+        Default scheduling policy with per-start overrides; raises ValueError
+        for bad input. An empty CPU list means the default yuri CPUs, never the
+        backend's own.
+        """
+        policy = SchedulingPolicy.from_dict(overrides, self.default_scheduling)
+        if policy.cpus is None:
+            policy.cpus = self.default_scheduling.cpus
+        return policy
+
+    def _apply_scheduling(self, proc: YuriProcess):
+        """Apply affinity/priority, check they took effect and move the process into its cgroup if it is limited"""
+        policy = proc.scheduling
+        policy.apply(proc.process.pid)
+        proc.scheduling_problems = policy.verify(proc.process.pid)
+        if policy.limited:
+            try:
+                proc.cgroup = self.cgroups.attach(proc.name, proc.process.pid, policy)
+            except OSError as e:
+                proc.scheduling_problems.append(f'cgroup limits not applied: {e}')
+        for problem in proc.scheduling_problems:
+            logger.warning(f"Yuri process '{proc.name}': {problem}")
+
+    def preview_dir(self, name: str) -> str:
+        """Directory the preview branches of a process write into"""
+        if self.preview_hub:
+            return self.preview_hub.preview_dir(name)
+        return os.path.join(PREVIEW_DIR, name)
+
+    def _clear_preview_files(self, preview_dir: str):
+        """Remove everything inside a preview directory, keeping the directory itself"""
+        for entry in os.listdir(preview_dir):
+            path = os.path.join(preview_dir, entry)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+
+    def _setup_preview_dir(self, name: str):
+        """Create and clean the preview directory of a process"""
+        preview_dir = self.preview_dir(name)
         try:
-            # Clean up any existing files
-            if os.path.exists(PREVIEW_DIR):
-                shutil.rmtree(PREVIEW_DIR)
-            os.makedirs(PREVIEW_DIR, exist_ok=True)
-            logger.info(f"Created preview directory: {PREVIEW_DIR}")
+            # The directory is kept (not recreated) so the preview inotify watch stays valid
+            os.makedirs(preview_dir, exist_ok=True)
+            self._clear_preview_files(preview_dir)
+            logger.info(f"Prepared preview directory: {preview_dir}")
         except Exception as e:
             logger.warning(f"Failed to setup preview directory: {e}")
 
-    def _cleanup_preview_dir(self):
-        """Clean up preview directory"""
+    def _cleanup_preview_dir(self, name: str):
+        """Clean up the preview directory of a process"""
+        preview_dir = self.preview_dir(name)
         try:
-            if os.path.exists(PREVIEW_DIR):
-                shutil.rmtree(PREVIEW_DIR)
-                logger.info(f"Cleaned up preview directory: {PREVIEW_DIR}")
+            if os.path.exists(preview_dir):
+                self._clear_preview_files(preview_dir)
+                logger.info(f"Cleaned up preview directory: {preview_dir}")
         except Exception as e:
             logger.warning(f"Failed to cleanup preview directory: {e}")
 
-    def start_process(self, name: str, config_path: str) -> Dict:
-        """Start a yuri process with given config"""
-        with self.lock:
-            # Stop existing process with same name
-            if name in self.processes:
-                self._stop_process_internal(name)
+    def _publish(self, event: str, data: Dict):
+        """Push an event to event stream subscribers"""
+        if self.event_bus:
+            self.event_bus.publish(event, data)
 
-            # Setup preview directory for output processes
-            if 'output' in name.lower():
-                self._setup_preview_dir()
+    def _publish_process(self, name: str, state: str, proc: Optional[YuriProcess] = None, **extra):
+        """Publish a process state transition (started, stopped, exited, crashed, restarted, source)"""
+        status = self._status_dict(proc) if proc else {'name': name, 'running': False}
+        self._publish('process', {'name': name, 'state': state, 'status': status, **extra})
 
+    def set_source(self, name: str, source: Optional[str]):
+        """Record the source a process receives, included in its status and published when it changes"""
+        with self.lock:
+            if self.sources.get(name) == source:
+                return
+            if source is None:
+                self.sources.pop(name, None)
+            else:
+                self.sources[name] = source
+            proc = self.processes.get(name)
+        if proc is not None:
+            self._set_state(proc, proc.state)
+            self._publish_process(name, 'source', proc)
+
+    def _set_preview(self, name: str, renditions: Optional[List[str]] = None):
+        """Track the preview renditions a process produces (none once it stops) and publish changes"""
+        renditions = list(renditions or [])
+        if self.previews.get(name, []) == renditions:
+            return
+        if renditions:
+            self.previews[name] = renditions
+        else:
+            self.previews.pop(name, None)
+        if self.preview_hub:
+            self.preview_hub.set_active(name, renditions)
+        self._publish('preview', {'pipeline': name, 'available': bool(renditions), 'renditions': renditions})
+
+    def get_previews(self) -> Dict[str, List[str]]:
+        """Renditions produced by each running pipeline that has a preview"""
+        return {name: list(renditions) for name, renditions in self.previews.items()}
+
+    def get_log(self, name: str) -> Optional[ProcessLog]:
+        """Captured output of a process name, or None if it never ran"""
+        return self.logs.get(name)
+
+    def _log_for(self, name: str) -> ProcessLog:
+        with self.lock:
+            log = self.logs.get(name)
+            if log is None:
+                log = self.logs[name] = ProcessLog(name, **self.log_settings)
+            return log
+
+    def _watch_process(self, proc: YuriProcess):
+        """Wait for a process to exit and report exits that were not requested"""
+        returncode = proc.process.wait()
+        self._log_for(proc.name).append('system', f'exited with code {returncode}')
+        if proc.cgroup:
+            self.cgroups.remove(proc.name)
+        if proc.state == 'starting':
+            # The start job may be about to mark it running; let it look first
+            proc.start_checked.wait()
+        if proc.stopping or proc.exit_reported:
+            # Requested, or reported by the start job
+            return
+
+        state = 'exited' if returncode == 0 else 'crashed'
+        logger.warning(f"Yuri process '{proc.name}' {state} with code {returncode}")
+        if proc.preview_renditions:
+            self._set_preview(proc.name, [])
+        proc.exit_code = returncode
+        self._set_state(proc, 'stopped' if returncode == 0 else 'failed')
+        self._publish_process(proc.name, state, proc, exit_code=returncode)
+        self._supervise_exit(proc, returncode)
+
+    # Supervision
+
+    def _supervision_for(self, name: str) -> _Supervision:
+        with self.lock:
+            sup = self.supervision.get(name)
+            if sup is None:
+                sup = self.supervision[name] = _Supervision()
+            return sup
+
+    def _supervise_exit(self, proc: YuriProcess, returncode: int):
+        """Record an unrequested exit and schedule a restart (or declare a crash loop)"""
+        sup = self._supervision_for(proc.name)
+        now = time.monotonic()
+        with self.lock:
+            sup.last_exit_code = returncode
+            sup.last_exit_at = time.time()
+            if self.restart_policy == 'never' or (self.restart_policy == 'on-failure' and returncode == 0):
+                return
+            if proc.uptime >= self.crash_loop_window:
+                # It ran stably; start the backoff from scratch
+                sup.delay = 0.0
+            sup.exits.append(now)
+            while sup.exits and sup.exits[0] < now - self.crash_loop_window:
+                sup.exits.popleft()
+            sup.crash_loop = len(sup.exits) > self.crash_loop_restarts
+            if sup.crash_loop:
+                sup.next_restart_at = None
+            else:
+                sup.delay = min(self.restart_backoff_max, sup.delay * 2 if sup.delay else self.restart_backoff)
+                sup.next_restart_at = time.time() + sup.delay
+            delay, generation = sup.delay, sup.generation
+
+        if sup.crash_loop:
+            logger.error(f"Yuri process '{proc.name}' is crash-looping ({len(sup.exits)} exits in "
+                         f"{self.crash_loop_window:.0f}s); not restarting")
+            self._set_state(proc, 'crash_loop')
+            self._publish_process(proc.name, 'crash_loop', proc, exit_code=returncode)
+            return
+
+        logger.warning(f"Restarting yuri process '{proc.name}' in {delay:.1f}s")
+        self._set_state(proc, 'backoff')
+        self._publish_process(proc.name, 'backoff', proc, exit_code=returncode, restart_in=delay)
+        threading.Thread(target=self._restart_later, args=(proc.name, generation, delay),
+                         name=f'yuri-restart-{proc.name}', daemon=True).start()
+
+    def _restart_later(self, name: str, generation: int, delay: float):
+        time.sleep(delay)
+        if self.supervision[name].generation == generation:
+            self._submit(name, self._supervised_restart, name, generation, wait=False)
+
+    def _supervised_restart(self, name: str, generation: int):
+        """Job: start a process again after it died, unless an operator took over meanwhile"""
+        sup = self.supervision[name]
+        if sup.generation != generation or sup.spec is None:
+            return
+        with self.lock:
+            dead = self.processes.get(name)
+            if dead is not None and dead.is_running:
+                return
+            # Already reaped; nothing to stop
+            self.processes.pop(name, None)
+            sup.restarts += 1
+            sup.next_restart_at = None
+        config_path, preview_renditions, ready_port, scheduling = sup.spec
+        try:
+            self._start_job(name, config_path, 'restarted', preview_renditions, ready_port, scheduling, True)
+        except RuntimeError:
+            # Reported and rescheduled by _start_job
+            pass
+
+    def _set_state(self, proc: YuriProcess, state: str):
+        """Move a process to a new state and publish a fresh status snapshot"""
+        proc.state = state
+        snapshot = self._status_dict(proc)
+        with self.lock:
+            if self.processes.get(proc.name) is not proc and state not in ('failed', 'backoff', 'crash_loop'):
+                return
+            snapshots = dict(self.snapshots)
+            if state == 'stopped' and proc.stopping:
+                snapshots.pop(proc.name, None)
+            else:
+                snapshots[proc.name] = snapshot
+            self.snapshots = snapshots
+
+    # Jobs
+
+    def _submit(self, name: str, action: Callable, *args, wait: bool = True):
+        """Queue a lifecycle job for a process; with wait, block until it ran and return its result"""
+        job = _Job(action, args)
+        with self.lock:
+            queue = self.jobs.get(name)
+            if queue is None:
+                queue = self.jobs[name] = deque()
+                threading.Thread(target=self._run_jobs, args=(name, queue),
+                                 name=f'yuri-jobs-{name}', daemon=True).start()
+            queue.append(job)
+        if not wait:
+            return None
+        job.done.wait()
+        if job.error is not None:
+            raise job.error
+        return job.result
+
+    def _run_jobs(self, name: str, queue: Deque[_Job]):
+        while True:
+            with self.lock:
+                if not queue:
+                    del self.jobs[name]
+                    return
+                job = queue.popleft()
             try:
-                logger.info(f"Starting yuri process '{name}' with config: {config_path}")
-                process = subprocess.Popen(
-                    [self.yuri_bin, '-f', config_path],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    env=self._get_env()
-                )
-
-                # Brief wait to check if it started successfully
-                time.sleep(0.5)
-                if process.poll() is not None:
-                    stderr = process.stderr.read().decode() if process.stderr else ''
-                    raise RuntimeError(f"Process exited immediately: {stderr}")
-
-                self.processes[name] = YuriProcess(name, config_path, process)
-                logger.info(f"Started yuri process '{name}' with PID {process.pid}")
-
-                return {
-                    'status': 'started',
-                    'name': name,
-                    'pid': process.pid,
-                    'config': config_path
-                }
+                job.result = job.action(*job.args)
             except Exception as e:
-                logger.error(f"Failed to start yuri process '{name}': {e}")
-                raise RuntimeError(f"Failed to start yuri: {e}")
+                job.error = e
+            finally:
+                job.done.set()
+
+    # Lifecycle
+
+    def start_process(self, name: str, config_path: str,
+                      preview_renditions: Optional[List[str]] = None,
+                      ready_port: Optional[int] = None, wait: bool = True,
+                      scheduling: Optional[SchedulingPolicy] = None) -> Dict:
+        """
+        Start a yuri process with given config.
+        preview_renditions lists the preview renditions the config produces
+        (and so where preview frames are expected). ready_port is
+        a control port to probe for readiness. scheduling overrides the
+        default SchedulingPolicy. Without wait the start runs
+        in the background and its progress is reported via status and events.
+        """
+        self._supervision_for(name).reset()
+        result = self._submit(name, self._start_job, name, config_path, 'started',
+                              preview_renditions, ready_port, scheduling, wait=wait)
+        return result if wait else {'status': 'starting', 'name': name, 'config': config_path}
+
+    def _start_job(self, name: str, config_path: str, event: str,
+                   preview_renditions: Optional[List[str]] = None,
+                   ready_port: Optional[int] = None, scheduling: Optional[SchedulingPolicy] = None,
+                   supervised: bool = False) -> Dict:
+        """
+        Start a yuri process, wait until it is ready and publish the given state
+        transition. A supervised (automatic) restart that fails is retried.
+        """
+        scheduling = scheduling or self.default_scheduling
+        self._supervision_for(name).spec = (config_path, preview_renditions, ready_port, scheduling)
+
+        # Stop existing process with same name
+        self._stop_job(name)
+
+        # Setup preview directory for processes with preview branches
+        if preview_renditions:
+            self._setup_preview_dir(name)
+
+        try:
+            logger.info(f"Starting yuri process '{name}' with config: {config_path}")
+            process = subprocess.Popen(
+                [self.yuri_bin, '-f', config_path],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                env=self._get_env()
+            )
+        except Exception as e:
+            logger.error(f"Failed to start yuri process '{name}': {e}")
+            raise RuntimeError(f"Failed to start yuri: {e}")
 
-    def _stop_process_internal(self, name: str) -> bool:
-        """Internal stop without lock (called from within locked context)"""
-        if name not in self.processes:
+        # Drain the pipes for the whole life of the process so yuri never blocks on a full pipe
+        log = self._log_for(name)
+        log_start = log.attach(process)
+
+        proc = YuriProcess(name, config_path, process, preview_renditions, ready_port, scheduling)
+        self._apply_scheduling(proc)
+        with self.lock:
+            self.processes[name] = proc
+        self._set_state(proc, 'starting')
+        self._publish_process(name, 'starting', proc)
+        threading.Thread(target=self._watch_process, args=(proc,),
+                         name=f'yuri-watch-{name}', daemon=True).start()
+        try:
+            if proc.preview_renditions:
+                self._set_preview(name, proc.preview_renditions)
+
+            proc.ready_signal = self._wait_ready(proc)
+            proc.startup_seconds = time.time() - proc.started_at
+            if process.poll() is not None:
+                log.drain()
+                stderr = log.text_since(log_start, 'stderr')
+                proc.exit_code = process.returncode
+                proc.exit_reported = True
+                proc.error = f"Process exited immediately: {stderr}"
+                with self.lock:
+                    if self.processes.get(name) is proc:
+                        del self.processes[name]
+                if proc.preview_renditions:
+                    self._cleanup_preview_dir(name)
+                    self._set_preview(name, [])
+                self._set_state(proc, 'failed')
+                self._publish_process(name, 'failed', proc, error=proc.error)
+                logger.error(f"Failed to start yuri process '{name}': {proc.error}")
+                if supervised:
+                    self._supervise_exit(proc, proc.exit_code)
+                raise RuntimeError(f"Failed to start yuri: {proc.error}")
+
+            self._set_state(proc, 'running')
+            logger.info(f"Started yuri process '{name}' with PID {process.pid} in {proc.startup_seconds:.2f}s "
+                        f"(ready: {proc.ready_signal or 'not confirmed'})")
+            self._publish_process(name, event, proc)
+        finally:
+            proc.start_checked.set()
+
+        return {
+            'status': 'started',
+            'name': name,
+            'pid': process.pid,
+            'config': config_path,
+            'ready': proc.ready_signal is not None,
+            'ready_signal': proc.ready_signal,
+            'startup_seconds': round(proc.startup_seconds, 3)
+        }
+
+    def _wait_ready(self, proc: YuriProcess) -> Optional[str]:
+        """
+        Wait until yuri confirms it is up; returns the signal seen, or None if
+        the process exited or ready_timeout passed first (it keeps running then).
+        """
+        deadline = time.monotonic() + self.ready_timeout
+        while proc.process.poll() is None:
+            signal_name = self._probe_ready(proc)
+            if signal_name:
+                return signal_name
+            if time.monotonic() >= deadline:
+                logger.warning(f"Yuri process '{proc.name}' not confirmed ready after {self.ready_timeout}s")
+                return None
+            time.sleep(READY_POLL_INTERVAL)
+        return None
+
+    def _probe_ready(self, proc: YuriProcess) -> Optional[str]:
+        """
+        Readiness signal: the control port accepts connections if one was
+        given, else the first preview frame for processes with previews,
+        else the graph is built (yuri runs every node in its own thread).
+        """
+        if proc.ready_port:
+            return 'control_port' if _port_open(proc.ready_port) else None
+        if proc.preview_renditions:
+            return 'preview_frame' if self._preview_frame_seen(proc) else None
+        return 'graph_threads' if thread_count(proc.process.pid) > 1 else None
+
+    def _preview_frame_seen(self, proc: YuriProcess) -> bool:
+        """Whether a preview branch has written its first frame"""
+        preview_dir = self.preview_dir(proc.name)
+        for rendition in proc.preview_renditions:
+            if glob.glob(os.path.join(preview_dir, f'{rendition}_*.jpg')):
+                return True
+        return False
+
+    def _stop_job(self, name: str) -> bool:
+        """Stop a process if it exists (runs on the process's job thread)"""
+        with self.lock:
+            proc = self.processes.get(name)
+        if proc is None:
             return False
 
-        proc = self.processes[name]
+        proc.stopping = True
+        self._set_state(proc, 'stopping')
         try:
             logger.info(f"Stopping yuri process '{name}' (PID {proc.process.pid})")
             proc.process.send_signal(signal.SIGTERM)
@@ -143,66 +598,85 @@ class YuriManager:
         except Exception as e:
             logger.error(f"Error stopping process '{name}': {e}")
 
-        # Cleanup preview directory for output processes
-        if 'output' in name.lower():
-            self._cleanup_preview_dir()
+        # Cleanup preview directory for processes with preview branches
+        if proc.preview_renditions:
+            self._cleanup_preview_dir(name)
+            self._set_preview(name, [])
 
-        del self.processes[name]
-        return True
-
-    def stop_process(self, name: str) -> Dict:
-        """Stop a running yuri process"""
+        self._set_state(proc, 'stopped')
         with self.lock:
-            if name not in self.processes:
-                return {'status': 'not_running', 'name': name}
-
-            self._stop_process_internal(name)
-            return {'status': 'stopped', 'name': name}
+            if self.processes.get(name) is proc:
+                del self.processes[name]
+        self._publish_process(name, 'stopped')
+        return True
 
-    def restart_process(self, name: str, new_config: Optional[str] = None) -> Dict:
+    def stop_process(self, name: str, wait: bool = True) -> Dict:
+        """Stop a running yuri process (and cancel a pending automatic restart)"""
+        self._supervision_for(name).reset()
+        if name not in self.processes and name not in self.jobs:
+            # Forget a failed start
+            with self.lock:
+                self.snapshots = {n: snap for n, snap in self.snapshots.items() if n != name}
+            return {'status': 'not_running', 'name': name}
+        stopped = self._submit(name, self._stop_job, name, wait=wait)
+        if not wait:
+            return {'status': 'stopping', 'name': name}
+        return {'status': 'stopped' if stopped else 'not_running', 'name': name}
+
+    def restart_process(self, name: str, new_config: Optional[str] = None, wait: bool = True) -> Dict:
         """Restart a process, optionally with new config"""
-        with self.lock:
-            if name not in self.processes:
-                return {'status': 'error', 'error': f"Process '{name}' not found"}
-
-            config = new_config or self.processes[name].config_path
-            self._stop_process_internal(name)
-
-        # Start outside lock to avoid holding it during startup
-        return self.start_process(name, config)
+        proc = self.processes.get(name)
+        if proc is None:
+            return {'status': 'error', 'error': f"Process '{name}' not found"}
+
+        config = new_config or proc.config_path
+        self._supervision_for(name).reset()
+        result = self._submit(name, self._start_job, name, config, 'restarted',
+                              proc.preview_renditions, proc.ready_port, proc.scheduling, wait=wait)
+        return result if wait else {'status': 'starting', 'name': name, 'config': config}
+
+    # Status
+
+    def _status_dict(self, proc: YuriProcess) -> Dict:
+        """Build the status snapshot for a process"""
+        running = proc.state in ('starting', 'running', 'stopping')
+        sup = self.supervision.get(proc.name) or _Supervision()
+        return {
+            'name': proc.name,
+            'source': self.sources.get(proc.name),
+            'state': proc.state,
+            'running': running,
+            'ready': proc.ready_signal is not None,
+            'ready_signal': proc.ready_signal,
+            'pid': proc.process.pid if running else None,
+            'config': proc.config_path,
+            'started_at': proc.started_at,
+            'startup_seconds': proc.startup_seconds,
+            'exit_code': proc.exit_code,
+            'error': proc.error,
+            'restarts': sup.restarts,
+            'last_exit_code': sup.last_exit_code,
+            'last_exit_at': sup.last_exit_at,
+            'next_restart_at': sup.next_restart_at,
+            'crash_loop': sup.crash_loop,
+            'scheduling': dict(proc.scheduling.to_dict(), cgroup=proc.cgroup,
+                               problems=proc.scheduling_problems)
+        }
+
+    @staticmethod
+    def _with_uptime(snapshot: Dict) -> Dict:
+        return dict(snapshot, uptime=time.time() - snapshot['started_at'])
 
     def get_status(self, name: str) -> Optional[Dict]:
-        """Get status of a process"""
-        with self.lock:
-            if name not in self.processes:
-                return None
-
-            proc = self.processes[name]
-            return {
-                'name': name,
-                'running': proc.is_running,
-                'pid': proc.process.pid if proc.is_running else None,
-                'config': proc.config_path,
-                'uptime': proc.uptime
-            }
+        """Get status of a process (lock-free snapshot)"""
+        snapshot = self.snapshots.get(name)
+        return self._with_uptime(snapshot) if snapshot else None
 
     def get_all_status(self) -> Dict[str, Dict]:
-        """Get status of all processes"""
-        with self.lock:
-            return {
-                name: {
-                    'name': name,
-                    'running': proc.is_running,
-                    'pid': proc.process.pid if proc.is_running else None,
-                    'config': proc.config_path,
-                    'uptime': proc.uptime
-                }
-                for name, proc in self.processes.items()
-            }
+        """Get status of all processes (lock-free snapshot)"""
+        return {name: self._with_uptime(snapshot) for name, snapshot in self.snapshots.items()}
 
     def stop_all(self):
         """Stop all running processes"""
-        with self.lock:
-            names = list(self.processes.keys())
-            for name in names:
-                self._stop_process_internal(name)
+        for name in list(self.processes.keys()):
+            self.stop_process(name)
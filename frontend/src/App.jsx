@@ -7,6 +7,7 @@ import OutputManager from './components/OutputManager';
 import IPManager from './components/IPManager';
 import CredentialsManager from './components/CredentialsManager';
 import StatusBar from './components/StatusBar';
+import VideoPreview from './components/VideoPreview';
 
 function App() {
   const [authenticated, setAuthenticated] = useState(null); // null = loading
@@ -16,6 +17,8 @@ function App() {
   const [selectedSource, setSelectedSource] = useState(null);
   const [viewerStatus, setViewerStatus] = useState({ running: false });
   const [outputStatus, setOutputStatus] = useState({ running: false });
+  const [previews, setPreviews] = useState({});
+  const [previewMonitors, setPreviewMonitors] = useState({});
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
 
@@ -48,15 +51,6 @@ function App() {
     setUsername(null);
   };
 
-  const fetchSources = useCallback(async () => {
-    try {
-      const data = await ndiApi.getSources();
-      setSources(data.sources || []);
-    } catch (err) {
-      console.error('Failed to fetch sources:', err);
-    }
-  }, []);
-
   const fetchStatus = useCallback(async () => {
     try {
       const [viewer, output] = await Promise.all([
@@ -73,17 +67,44 @@ function App() {
     }
   }, []);
 
+  const applyProcessStatus = useCallback((name, status) => {
+    if (name === 'viewer') {
+      setViewerStatus(status);
+      if (status.source) {
+        setSelectedSource(status.source);
+      }
+    } else if (name === 'output') {
+      setOutputStatus(status);
+    }
+  }, []);
+
+  // Server pushes source, process and preview changes; no polling needed
   useEffect(() => {
     if (!authenticated) return;
 
-    fetchSources();
-    fetchStatus();
-    const interval = setInterval(() => {
-      fetchSources();
-      fetchStatus();
-    }, 5000);
-    return () => clearInterval(interval);
-  }, [authenticated, fetchSources, fetchStatus]);
+    return ndiApi.subscribeEvents({
+      snapshot: (data) => {
+        setSources(data.sources || []);
+        const processes = data.processes || {};
+        applyProcessStatus('viewer', processes.viewer || { running: false, name: 'viewer' });
+        applyProcessStatus('output', processes.output || { running: false, name: 'output' });
+        setPreviews(data.previews || {});
+        setPreviewMonitors(data.preview_monitors || {});
+      },
+      sources: (data) => setSources(data.sources || []),
+      process: (data) => applyProcessStatus(data.name, data.status),
+      preview: (data) => setPreviews(prev => {
+        const next = { ...prev };
+        if (data.available) {
+          next[data.pipeline] = data.renditions;
+        } else {
+          delete next[data.pipeline];
+        }
+        return next;
+      }),
+      preview_monitor: (data) => setPreviewMonitors(prev => ({ ...prev, [data.name]: data }))
+    });
+  }, [authenticated, applyProcessStatus]);
 
   const handleRefreshSources = async () => {
     setLoading(true);
@@ -189,6 +210,8 @@ function App() {
               {viewerStatus.running ? (
                 <div>
                   <p>Now viewing: <strong>{selectedSource}</strong></p>
+                  <div className="preview-label">Source Preview</div>
+                  <VideoPreview enabled={viewerStatus.running} pipeline="viewer_preview" />
                   <button onClick={handleStopViewer}>Stop Viewer</button>
                 </div>
               ) : (
@@ -206,6 +229,7 @@ function App() {
         {view === 'output' && (
           <OutputManager
             status={outputStatus}
+            previewAvailable={Boolean(previews.output || (previewMonitors.output_preview && previewMonitors.output_preview.source))}
             onStatusChange={fetchStatus}
             onError={setError}
           />
@@ -133,11 +133,68 @@ export const ndiApi = {
   },
 
   // PTZ
-  async ptzMove(panSpeed, tiltSpeed) {
+  // Persistent WebSocket channel for PTZ commands. send() returns false while
+  // the socket is not open so callers can fall back to the HTTP endpoints.
+  openPtzChannel({ onAck } = {}) {
+    const protocol = window.location.protocol === 'https:' ? 'wss' : 'ws';
+    const url = `${protocol}://${window.location.host}${API_BASE}/ptz/ws`;
+    let socket = null;
+    let closed = false;
+    let retryTimer = null;
+    let nextId = 1;
+
+    const connect = () => {
+      socket = new WebSocket(url);
+      socket.onmessage = (e) => {
+        if (!onAck) return;
+        try {
+          onAck(JSON.parse(e.data));
+        } catch (err) {
+          console.error('Failed to handle PTZ ack:', err);
+        }
+      };
+      socket.onclose = () => {
+        if (!closed) {
+          retryTimer = setTimeout(connect, 2000);
+        }
+      };
+    };
+    connect();
+
+    return {
+      send(command) {
+        if (!socket || socket.readyState !== WebSocket.OPEN) return false;
+        socket.send(JSON.stringify({ ...command, id: nextId++ }));
+        return true;
+      },
+      isOpen() {
+        return Boolean(socket && socket.readyState === WebSocket.OPEN);
+      },
+      close() {
+        closed = true;
+        clearTimeout(retryTimer);
+        if (socket) socket.close();
+      }
+    };
+  },
+
+  async ptzMove(panSpeed, tiltSpeed, leaseMs = null) {
+    const body = { pan_speed: panSpeed, tilt_speed: tiltSpeed };
+    if (leaseMs) body.lease_ms = leaseMs;
     const res = await fetch(`${API_BASE}/ptz/move`, {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ pan_speed: panSpeed, tilt_speed: tiltSpeed })
+      body: JSON.stringify(body)
+    });
+    return handleResponse(res);
+  },
+
+  // Ordered list of {op, ...} commands applied in one request
+  async ptzBatch(commands) {
+    const res = await fetch(`${API_BASE}/ptz/batch`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ commands })
     });
     return handleResponse(res);
   },
@@ -156,24 +213,37 @@ export const ndiApi = {
     return handleResponse(res);
   },
 
-  async ptzRecallPreset(preset, speed = 1.0) {
+  // mode: 'native' (camera recalls the preset) or 'interpolated' (server-driven move); null uses the server default
+  async ptzRecallPreset(preset, speed = 1.0, mode = null) {
+    const body = { preset, speed };
+    if (mode) body.mode = mode;
     const res = await fetch(`${API_BASE}/ptz/preset/recall`, {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ preset, speed })
+      body: JSON.stringify(body)
     });
     return handleResponse(res);
   },
 
-  async ptzStorePreset(preset) {
+  async ptzStorePreset(preset, name = null) {
     const res = await fetch(`${API_BASE}/ptz/preset/store`, {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ preset })
+      body: JSON.stringify(name ? { preset, name } : { preset })
     });
     return handleResponse(res);
   },
 
+  async ptzGetPresets() {
+    const res = await fetch(`${API_BASE}/ptz/presets`);
+    return handleResponse(res);
+  },
+
+  async ptzDeletePreset(preset) {
+    const res = await fetch(`${API_BASE}/ptz/presets/${preset}`, { method: 'DELETE' });
+    return handleResponse(res);
+  },
+
   async ptzAutoFocus() {
     const res = await fetch(`${API_BASE}/ptz/focus`, {
       method: 'POST',
@@ -232,6 +302,24 @@ export const ndiApi = {
     return handleResponse(res);
   },
 
+  // Events
+  // Subscribes to the server-sent event stream. `handlers` maps event names
+  // (snapshot, sources, process, preview) to callbacks receiving the parsed data.
+  // Returns a function that closes the stream.
+  subscribeEvents(handlers) {
+    const source = new EventSource(`${API_BASE}/events`);
+    Object.entries(handlers).forEach(([event, handler]) => {
+      source.addEventListener(event, (e) => {
+        try {
+          handler(JSON.parse(e.data));
+        } catch (err) {
+          console.error(`Failed to handle ${event} event:`, err);
+        }
+      });
+    });
+    return () => source.close();
+  },
+
   // Health
   async getHealth() {
     const res = await fetch(`${API_BASE}/health`);
@@ -2,7 +2,7 @@ import React, { useState, useEffect, useCallback } from 'react';
 import { ndiApi } from '../api/ndiApi';
 import VideoPreview from './VideoPreview';
 
-function OutputManager({ status, onStatusChange, onError }) {
+function OutputManager({ status, previewAvailable, onStatusChange, onError }) {
   const [devices, setDevices] = useState([]);
   const [config, setConfig] = useState({
     name: 'Pi Camera',
@@ -87,7 +87,7 @@ function OutputManager({ status, onStatusChange, onError }) {
       <h2>NDI Output</h2>
 
       <div className="preview-label">Live Preview</div>
-      <VideoPreview enabled={status.running} />
+      <VideoPreview enabled={status.running && previewAvailable} />
 
       {status.running ? (
         <div>
@@ -1,24 +1,54 @@
-import React, { useState, useCallback, useRef } from 'react';
+import React, { useState, useCallback, useRef, useEffect } from 'react';
 import { ndiApi } from '../api/ndiApi';
 
+// Moves run under a server-side deadman lease: the camera stops by itself
+// unless the move is renewed within MOVE_LEASE_MS, so a throttled tab or a
+// dropped connection can never leave it moving.
+const MOVE_LEASE_MS = 600;
+const MOVE_RENEW_INTERVAL = 200;
+
 function PTZControls({ enabled, onError }) {
   const [speed, setSpeed] = useState(0.5);
   const moveInterval = useRef(null);
+  const channel = useRef(null);
 
-  const startMove = useCallback((panSpeed, tiltSpeed) => {
+  // One persistent PTZ channel while controls are enabled
+  useEffect(() => {
     if (!enabled) return;
-
-    const doMove = async () => {
-      try {
-        await ndiApi.ptzMove(panSpeed * speed, tiltSpeed * speed);
-      } catch (err) {
-        onError(err.message);
+    channel.current = ndiApi.openPtzChannel({
+      onAck: (ack) => {
+        if (ack.ok === false && ack.error) onError(ack.error);
       }
+    });
+    return () => {
+      channel.current.close();
+      channel.current = null;
     };
+  }, [enabled, onError]);
+
+  // Send over the WebSocket when it is open, otherwise use the HTTP endpoint
+  const sendCommand = useCallback(async (command, httpFallback) => {
+    if (channel.current && channel.current.send(command)) return;
+    try {
+      await httpFallback();
+    } catch (err) {
+      onError(err.message);
+    }
+  }, [onError]);
+
+  const startMove = useCallback((panSpeed, tiltSpeed) => {
+    if (!enabled) return;
+
+    const pan = panSpeed * speed;
+    const tilt = tiltSpeed * speed;
+    const doMove = () => sendCommand(
+      { op: 'move', pan, tilt, lease: MOVE_LEASE_MS },
+      () => ndiApi.ptzMove(pan, tilt, MOVE_LEASE_MS)
+    );
 
     doMove();
-    moveInterval.current = setInterval(doMove, 100);
-  }, [enabled, speed, onError]);
+    moveInterval.current = setInterval(doMove, MOVE_RENEW_INTERVAL);
+  }, [enabled, speed, sendCommand]);
 
   const stopMove = useCallback(async () => {
     if (moveInterval.current) {
@@ -26,30 +56,24 @@ function PTZControls({ enabled, onError }) {
       moveInterval.current = null;
     }
     if (!enabled) return;
-    try {
-      await ndiApi.ptzStop();
-    } catch (err) {
-      onError(err.message);
-    }
-  }, [enabled, onError]);
+    await sendCommand({ op: 'stop' }, () => ndiApi.ptzStop());
+  }, [enabled, sendCommand]);
 
   const handleZoom = useCallback(async (zoomSpeed) => {
     if (!enabled) return;
-    try {
-      await ndiApi.ptzZoom(zoomSpeed * speed);
-    } catch (err) {
-      onError(err.message);
-    }
-  }, [enabled, speed, onError]);
+    await sendCommand(
+      { op: 'zoom', speed: zoomSpeed * speed },
+      () => ndiApi.ptzZoom(zoomSpeed * speed)
+    );
+  }, [enabled, speed, sendCommand]);
 
   const handlePreset = useCallback(async (preset) => {
     if (!enabled) return;
-    try {
-      await ndiApi.ptzRecallPreset(preset);
-    } catch (err) {
-      onError(err.message);
-    }
-  }, [enabled, onError]);
+    await sendCommand(
+      { op: 'preset', recall: preset },
+      () => ndiApi.ptzRecallPreset(preset)
+    );
+  }, [enabled, sendCommand]);
 
   const handleStorePreset = useCallback(async (preset) => {
     if (!enabled) return;
@@ -1,6 +1,12 @@
 import React, { useState, useEffect } from 'react';
 
-function VideoPreview({ enabled }) {
+function VideoPreview({ enabled, fps, rendition, pipeline }) {
+  const params = new URLSearchParams();
+  if (pipeline) params.set('pipeline', pipeline);
+  if (rendition) params.set('rendition', rendition);
+  if (fps) params.set('fps', fps);
+  const query = params.toString();
+
   const [hasError, setHasError] = useState(false);
   const [key, setKey] = useState(0);
 
@@ -38,7 +44,7 @@ function VideoPreview({ enabled }) {
       ) : (
         <img
           key={key}
-          src="/api/preview/stream"
+          src={query ? `/api/preview/stream?${query}` : '/api/preview/stream'}
           alt="Camera Preview"
           className="preview-stream"
           onError={() => setHasError(true)}
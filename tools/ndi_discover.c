@@ -2,28 +2,166 @@
  * NDI Source Discovery Tool
  * Uses NDI SDK directly to discover sources on the network
  *
+ * One-shot mode prints the sources found after the timeout and exits.
+ * Watch mode (--watch) keeps the finder alive and writes one JSON object
+ * per line whenever a source is added or removed:
+ *
+ *   {"event":"added","name":"HOST (Camera)","url":"192.168.1.10:5961"}
+ *   {"event":"removed","name":"HOST (Camera)","url":"192.168.1.10:5961"}
+ *
  * Compile: gcc -o ndi_discover ndi_discover.c -lndi -L/usr/local/lib -I/usr/local/include
  */
 
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
+#include <signal.h>
 #include <unistd.h>
 #include <Processing.NDI.Lib.h>
 
+typedef struct {
+    char* name;
+    char* url;
+} source_entry_t;
+
+static volatile sig_atomic_t running = 1;
+
+static void handle_signal(int sig) {
+    (void)sig;
+    running = 0;
+}
+
+// Write a string as a JSON string literal
+static void print_json_string(const char* s) {
+    putchar('"');
+    for (const unsigned char* p = (const unsigned char*)(s ? s : ""); *p; p++) {
+        switch (*p) {
+            case '"':  fputs("\\\"", stdout); break;
+            case '\\': fputs("\\\\", stdout); break;
+            case '\b': fputs("\\b", stdout); break;
+            case '\f': fputs("\\f", stdout); break;
+            case '\n': fputs("\\n", stdout); break;
+            case '\r': fputs("\\r", stdout); break;
+            case '\t': fputs("\\t", stdout); break;
+            default:
+                if (*p < 0x20) {
+                    printf("\\u%04x", *p);
+                } else {
+                    putchar(*p);
+                }
+        }
+    }
+    putchar('"');
+}
+
+static void emit_event(const char* event, const char* name, const char* url) {
+    fputs("{\"event\":", stdout);
+    print_json_string(event);
+    fputs(",\"name\":", stdout);
+    print_json_string(name);
+    fputs(",\"url\":", stdout);
+    print_json_string(url);
+    fputs("}\n", stdout);
+}
+
+static const char* source_url(const NDIlib_source_t* source) {
+    if (source->p_url_address && strlen(source->p_url_address) > 0) {
+        return source->p_url_address;
+    }
+    return "unknown";
+}
+
+static void free_entries(source_entry_t* entries, uint32_t count) {
+    for (uint32_t i = 0; i < count; i++) {
+        free(entries[i].name);
+        free(entries[i].url);
+    }
+    free(entries);
+}
+
+// Keep the finder alive and report changes until interrupted
+static int run_watch(NDIlib_find_instance_t finder) {
+    source_entry_t* known = NULL;
+    uint32_t num_known = 0;
+
+    signal(SIGINT, handle_signal);
+    signal(SIGTERM, handle_signal);
+
+    while (running) {
+        // Returns false on timeout, which lets us notice signals regularly
+        if (!NDIlib_find_wait_for_sources(finder, 1000)) {
+            continue;
+        }
+
+        uint32_t num_sources = 0;
+        const NDIlib_source_t* sources = NDIlib_find_get_current_sources(finder, &num_sources);
+
+        source_entry_t* current = calloc(num_sources ? num_sources : 1, sizeof(source_entry_t));
+        if (!current) {
+            fprintf(stderr, "ERROR: Out of memory\n");
+            free_entries(known, num_known);
+            return 1;
+        }
+
+        // Removed (or re-addressed) sources
+        for (uint32_t i = 0; i < num_known; i++) {
+            int still_present = 0;
+            for (uint32_t j = 0; j < num_sources; j++) {
+                if (strcmp(known[i].name, sources[j].p_ndi_name) == 0 &&
+                    strcmp(known[i].url, source_url(&sources[j])) == 0) {
+                    still_present = 1;
+                    break;
+                }
+            }
+            if (!still_present) {
+                emit_event("removed", known[i].name, known[i].url);
+            }
+        }
+
+        // Added sources; copy the list since the SDK owns the returned memory
+        for (uint32_t j = 0; j < num_sources; j++) {
+            int was_known = 0;
+            for (uint32_t i = 0; i < num_known; i++) {
+                if (strcmp(known[i].name, sources[j].p_ndi_name) == 0 &&
+                    strcmp(known[i].url, source_url(&sources[j])) == 0) {
+                    was_known = 1;
+                    break;
+                }
+            }
+            if (!was_known) {
+                emit_event("added", sources[j].p_ndi_name, source_url(&sources[j]));
+            }
+            current[j].name = strdup(sources[j].p_ndi_name);
+            current[j].url = strdup(source_url(&sources[j]));
+        }
+
+        fflush(stdout);
+        free_entries(known, num_known);
+        known = current;
+        num_known = num_sources;
+    }
+
+    free_entries(known, num_known);
+    return 0;
+}
+
 int main(int argc, char* argv[]) {
     int timeout_ms = 5000;  // Default 5 seconds
+    int watch = 0;
 
     // Parse arguments
     for (int i = 1; i < argc; i++) {
         if (strcmp(argv[i], "-t") == 0 && i + 1 < argc) {
             timeout_ms = atoi(argv[i + 1]) * 1000;
             i++;
+        } else if (strcmp(argv[i], "-w") == 0 || strcmp(argv[i], "--watch") == 0) {
+            watch = 1;
         } else if (strcmp(argv[i], "-h") == 0 || strcmp(argv[i], "--help") == 0) {
-            printf("Usage: %s [-t timeout_seconds]\n", argv[0]);
+            printf("Usage: %s [-t timeout_seconds] [--watch]\n", argv[0]);
             printf("Discovers NDI sources on the network.\n");
             printf("Options:\n");
             printf("  -t <seconds>  Discovery timeout (default: 5)\n");
+            printf("  -w, --watch   Keep running and print added/removed sources as JSON lines\n");
             printf("\nEnvironment:\n");
             printf("  NDI_EXTRA_IPS  Comma-separated list of extra IPs for discovery\n");
             return 0;
@@ -52,6 +190,13 @@ int main(int argc, char* argv[]) {
         return 1;
     }
 
+    if (watch) {
+        int ret = run_watch(finder);
+        NDIlib_find_destroy(finder);
+        NDIlib_destroy();
+        return ret;
+    }
+
     // Wait for sources
     NDIlib_find_wait_for_sources(finder, timeout_ms);
 